@@ -0,0 +1,8 @@
+"""
+Benchmarks of all three games, over fixed, seeded corpora, to catch the solvers getting slower or bigger.
+Run with eg.:
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json
+
+These are not installed with the package.
+"""
@@ -0,0 +1,31 @@
+import sys
+from argparse import ArgumentParser
+
+from benchmarks.suite import compare_results, print_result, read_results, run_benchmarks, write_results
+from word_games.instrument import PROFILE_HELP, profiled
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Time the games over fixed corpora, and compare them with a saved baseline.')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this JSON file, from an earlier --output')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='How much slower (or bigger) a benchmark can be than the baseline, eg. 0.2 for 20%%')
+    parser.add_argument('--only', nargs='*', default=[], help='Only run the benchmarks starting with these, eg. boggle')
+    parser.add_argument('--count', type=int, default=20, help='The number of boards and pairs of each kind')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of timed runs of each benchmark')
+    parser.add_argument('--tiles', default='./make5/tiles.txt', help='The frequency of each Make five tile')
+    parser.add_argument('--words', default='./data/words.txt', help='The word list')
+    parser.add_argument('--profile', metavar='FILE', help=PROFILE_HELP)
+    args = parser.parse_args()
+
+    with profiled(args.profile):
+        results = run_benchmarks(args.words, args.tiles, args.count, args.repeat, args.only, print_result)
+    if args.output:
+        write_results(results, args.output, args.words)
+    if args.baseline:
+        lines, regressions = compare_results(results, read_results(args.baseline), args.tolerance)
+        print(f'\nCompared with {args.baseline}:')
+        print('\n'.join(lines))
+        if regressions:
+            print(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+            sys.exit(1)
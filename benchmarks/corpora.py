@@ -0,0 +1,88 @@
+"""
+The inputs the benchmarks time. Each comes from its own seed, so they are the same on every run
+(given the same word list).
+"""
+import random
+from typing import Dict, List, Sequence, Tuple
+
+from boggle.generate import generate_board, get_default_dice_name, get_dice
+from make5.lookahead import place
+from make5.types import FrequencyDict
+from make5.utilities import SYMBOL
+from word_ladder.graph import WordGraph
+
+SEED = 2021
+BOGGLE_SIZES = (4, 5, 6)
+LADDER_LENGTHS = (3, 4, 5, 6, 7, 8)
+MAKE5_FILLS = (0.2, 0.4, 0.6, 0.8)
+
+
+def get_boggle_boards(size: int, count: int, seed: int = SEED) -> List[List[str]]:
+    """
+    >>> get_boggle_boards(4, 2) == get_boggle_boards(4, 2), len(get_boggle_boards(6, 1)[0])
+    (True, 6)
+    """
+    rng = random.Random(f'boggle:{seed}:{size}')
+    dice = get_dice(get_default_dice_name(size), size)
+    return [generate_board(dice, size, rng) for _ in range(count)]
+
+
+def get_ladder_pairs(graph: WordGraph, length: int, count: int, seed: int = SEED) -> List[Tuple[str, str]]:
+    """
+    Pairs of different words of the given length with a ladder between them (as many as there are, up to `count`).
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> from word_ladder.graph import build_graph
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'fig', 'fin', 'cat']:
+    ...     words = add_to_words_dict(words, w)
+    >>> pairs = get_ladder_pairs(build_graph(words), 3, 4)
+    >>> len(pairs), all(build_graph(words).is_connected(*pair) for pair in pairs), pairs == get_ladder_pairs(build_graph(words), 3, 4)
+    (4, True, True)
+    """
+    rng = random.Random(f'ladder:{seed}:{length}')
+    components: Dict[int, List[str]] = {}
+    for word_id, word in enumerate(graph.words):
+        if len(word) == length:
+            components.setdefault(graph.components[word_id], []).append(word)
+    # Only words with at least one other word to reach.
+    words = [word for component in components.values() if len(component) > 1 for word in component]
+    pairs = []
+    for start_word in rng.sample(words, min(count, len(words))):
+        component = components[graph.components[graph.get_id(start_word)]]
+        target_word = rng.choice([word for word in component if word != start_word])
+        pairs.append((start_word, target_word))
+    return pairs
+
+
+def get_make5_grids(fill: float, count: int, frequency: FrequencyDict, size: int = 5,
+                    seed: int = SEED) -> List[Tuple[str, ...]]:
+    """
+    Grids with about `fill` of their cells holding tiles drawn from the frequencies.
+    >>> grids = get_make5_grids(0.4, 2, {'a': 0.5, 'b': 0.5})
+    >>> grids == get_make5_grids(0.4, 2, {'a': 0.5, 'b': 0.5}), [''.join(grid).count(SYMBOL) for grid in grids]
+    (True, [15, 15])
+    """
+    rng = random.Random(f'make5:{seed}:{fill}:{size}')
+    letters = sorted(frequency)
+    weights = [frequency[letter] for letter in letters]
+    cells = [(row, col) for row in range(size) for col in range(size)]
+    grids = []
+    for _ in range(count):
+        grid = (SYMBOL * size,) * size
+        for cell in rng.sample(cells, round(fill * len(cells))):
+            grid = place(grid, cell, rng.choices(letters, weights)[0])
+        grids.append(grid)
+    return grids
+
+
+def get_lines(grids: Sequence[Sequence[str]]) -> List[str]:
+    """
+    The rows and columns of the grids.
+    >>> get_lines([('ab', 'cd')])
+    ['ab', 'cd', 'ac', 'bd']
+    """
+    return [
+        line
+        for grid in grids
+        for line in [*grid, *(''.join(row[col] for row in grid) for col in range(len(grid[0])))]
+    ]
@@ -0,0 +1,220 @@
+"""
+Each benchmark times a piece of work over a corpus (the best of a few runs), and then runs it once more
+under `tracemalloc` to find the most memory it used at once. The results can be saved as JSON,
+and compared with a saved baseline.
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import boggle.compile_words
+import make5.compile_words
+import word_ladder.compile_words
+from benchmarks.corpora import (BOGGLE_SIZES, LADDER_LENGTHS, MAKE5_FILLS, get_boggle_boards, get_ladder_pairs,
+                                get_lines, get_make5_grids)
+from boggle.boggle_types import Board, WordsSubtree
+from boggle.result import BoggleResult
+from boggle.solve import find_words, solve_board
+from make5.utilities import get_combo_cache, get_full_length_combos, get_subwords, read_frequencies, set_combo_cache
+from word_games.cache import LRUCache, TieredCache
+from word_games.index_file import get_index_path
+from word_ladder.graph import load_graph
+from word_ladder.rung import Rung
+from word_ladder.types import WordIndex
+from word_ladder.utilities import build_rungs
+
+# The kind of index and the load_words of each game.
+GAMES: Dict[str, Tuple[str, Callable[..., Any]]] = {
+    'boggle': (boggle.compile_words.INDEX_KIND, boggle.compile_words.load_words),
+    'make5': (make5.compile_words.INDEX_KIND, make5.compile_words.load_words),
+    'word_ladder': (word_ladder.compile_words.INDEX_KIND, word_ladder.compile_words.load_words),
+}
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    items: int  # The number of boards, pairs, lines, etc. which each run works through.
+    run: Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    items: int
+    seconds: float  # The fastest run.
+    peak_bytes: int  # The most memory allocated at once during a run, beyond what was allocated before it.
+
+    @property
+    def milliseconds_per_item(self) -> float:
+        return 1000 * self.seconds / max(self.items, 1)
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 3) -> BenchmarkResult:
+    """
+    >>> result = run_benchmark(Benchmark('sum', 10, lambda: sum(range(1000))), repeat=2)
+    >>> result.name, result.items, result.seconds < 1, result.peak_bytes < 10000
+    ('sum', 10, True, True)
+    """
+    seconds = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        benchmark.run()
+        seconds.append(time.perf_counter() - start_time)
+    # Tracing slows everything down, so the memory is measured on a run of its own.
+    tracemalloc.start()
+    try:
+        benchmark.run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(benchmark.name, benchmark.items, min(seconds), peak_bytes)
+
+
+def get_index_benchmarks(path: str, index_dir: str) -> Iterator[Benchmark]:
+    """
+    Building each game's index from the word list, and loading it again.
+    """
+    for game, (kind, load_words) in GAMES.items():
+        index_path = os.path.join(index_dir, os.path.basename(get_index_path(path, kind)))
+        yield Benchmark(f'{game}.build_index', 1, partial(load_words, path, index_path, rebuild=True))
+        yield Benchmark(f'{game}.load_index', 1, partial(load_words, path, index_path))
+
+
+def find_all_words(boards: Sequence[Board], words: WordsSubtree) -> List[Set[str]]:
+    return [set(find_words(board, words)) for board in boards]
+
+
+def solve_boards(boards: Sequence[Board], words: WordsSubtree) -> List[BoggleResult]:
+    return [solve_board(board, words) for board in boards]
+
+
+def build_all_rungs(pairs: Sequence[Tuple[str, str]], words: WordIndex) -> List[Rung]:
+    return [build_rungs(start, target, words) for start, target in pairs]
+
+
+def get_boggle_benchmarks(path: str, count: int) -> Iterator[Benchmark]:
+    words = boggle.compile_words.load_words(path)
+    for size in BOGGLE_SIZES:
+        boards = get_boggle_boards(size, count)
+        yield Benchmark(f'boggle.find_words.{size}x{size}', len(boards), partial(find_all_words, boards, words))
+        yield Benchmark(f'boggle.solve_board.{size}x{size}', len(boards), partial(solve_boards, boards, words))
+
+
+def get_ladder_benchmarks(path: str, count: int) -> Iterator[Benchmark]:
+    words = word_ladder.compile_words.load_words(path)
+    graph = load_graph(path)
+    for length in LADDER_LENGTHS:
+        pairs = get_ladder_pairs(graph, length, count)
+        if pairs:
+            yield Benchmark(f'word_ladder.build_rungs.{length}', len(pairs), partial(build_all_rungs, pairs, words))
+
+
+def get_make5_benchmarks(path: str, tiles_path: str, count: int) -> Iterator[Benchmark]:
+    words = make5.compile_words.load_words(path)
+    frequency = read_frequencies(tiles_path)
+
+    def get_combos(lines: Sequence[str]) -> None:
+        # With nothing cached, so that every run works out every combo.
+        cache = get_combo_cache()
+        set_combo_cache(TieredCache(LRUCache(len(lines))))
+        try:
+            for line in lines:
+                get_full_length_combos(tuple(get_subwords(words, line)), len(line))
+        finally:
+            set_combo_cache(cache)
+
+    for fill in MAKE5_FILLS:
+        lines = get_lines(get_make5_grids(fill, count, frequency))
+        yield Benchmark(f'make5.get_full_length_combos.{round(100 * fill)}%', len(lines), partial(get_combos, lines))
+
+
+def get_benchmarks(path: str, tiles_path: str, index_dir: str, count: int) -> Iterator[Benchmark]:
+    yield from get_index_benchmarks(path, index_dir)
+    yield from get_boggle_benchmarks(path, count)
+    yield from get_ladder_benchmarks(path, count)
+    yield from get_make5_benchmarks(path, tiles_path, max(1, count // 5))
+
+
+def run_benchmarks(path: str, tiles_path: str, count: int = 20, repeat: int = 3, only: Sequence[str] = (),
+                   report: Optional[Callable[[BenchmarkResult], None]] = None) -> List[BenchmarkResult]:
+    """
+    Runs the benchmarks whose names start with any of `only` (or all of them).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as index_dir:
+        for benchmark in get_benchmarks(path, tiles_path, index_dir, count):
+            if only and not any(benchmark.name.startswith(prefix) for prefix in only):
+                continue
+            result = run_benchmark(benchmark, repeat)
+            if report is not None:
+                report(result)
+            results.append(result)
+    return results
+
+
+def print_result(result: BenchmarkResult) -> None:
+    """
+    >>> print_result(BenchmarkResult('boggle.solve_board.4x4', 20, 0.05, 2 * 1024 * 1024))
+    boggle.solve_board.4x4                       20 ×    2.500ms =   50.0ms, peak   2,048.0KB
+    """
+    print(f'{result.name:40} {result.items:6} × {result.milliseconds_per_item:8.3f}ms = '
+          f'{1000 * result.seconds:6.1f}ms, peak {result.peak_bytes / 1024:9,.1f}KB')
+
+
+def write_results(results: Sequence[BenchmarkResult], output_path: str, path: str) -> None:
+    data = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'words': path,
+        'results': [asdict(result) for result in results],
+    }
+    with open(output_path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def read_results(path: str) -> List[BenchmarkResult]:
+    with open(path, 'r') as f:
+        return [BenchmarkResult(**result) for result in json.load(f)['results']]
+
+
+def compare_results(results: Sequence[BenchmarkResult], baseline: Sequence[BenchmarkResult],
+                    tolerance: float = 0.2) -> Tuple[List[str], List[str]]:
+    """
+    A line comparing each result with the baseline, and the names of those which took more than
+    `tolerance` longer (or used that much more memory).
+    >>> baseline = [BenchmarkResult('a', 10, 1.0, 1000), BenchmarkResult('b', 10, 1.0, 1000)]
+    >>> lines, regressions = compare_results([BenchmarkResult('a', 10, 0.5, 1000), BenchmarkResult('b', 10, 1.5, 1000),
+    ...                                       BenchmarkResult('c', 10, 1.0, 1000)], baseline)
+    >>> print('\\n'.join(lines)); regressions
+    a                                        time  0.50x, peak  1.00x
+    b                                        time  1.50x, peak  1.00x  REGRESSION
+    c                                        (not in the baseline)
+    ['b']
+    """
+    baseline_by_name: Dict[str, BenchmarkResult] = {result.name: result for result in baseline}
+    lines = []
+    regressions = []
+    for result in results:
+        old = baseline_by_name.get(result.name)
+        if old is None:
+            lines.append(f'{result.name:40} (not in the baseline)')
+            continue
+        # Compare per item, in case the corpus has changed size.
+        time_ratio = result.milliseconds_per_item / max(old.milliseconds_per_item, 1e-9)
+        peak_ratio = result.peak_bytes / max(old.peak_bytes, 1)
+        regressed = time_ratio > 1 + tolerance or peak_ratio > 1 + tolerance
+        if regressed:
+            regressions.append(result.name)
+        lines.append(f'{result.name:40} time {time_ratio:5.2f}x, peak {peak_ratio:5.2f}x{"  REGRESSION" if regressed else ""}')
+    return lines, regressions
@@ -1,5 +1,18 @@
-from typing import Tuple, Sequence
+from typing import Any, Optional, Protocol, Tuple, Sequence
 
 Position = Tuple[int, int, str]
 
-Board = Sequence[str]
\ No newline at end of file
+Board = Sequence[str]
+
+
+class WordsSubtree(Protocol):
+    """
+    The part of a words trie that the solver walks: either the nested dicts built by
+    `boggle.compile_words.read_words`, or a `boggle.dawg.DawgNode`.
+    '.' in a subtree means the letters so far make a word.
+    """
+    def __contains__(self, letter: object) -> bool: ...
+
+    def __getitem__(self, letter: str) -> Any: ...
+
+    def get(self, letter: str, default: Optional[Any] = None) -> Any: ...
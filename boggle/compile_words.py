@@ -1,5 +1,11 @@
+from boggle.dawg import Dawg, DawgNode, build_dawg
 from boggle.replacements import replace_special
 from typing import Optional, Dict
+from word_games.index_file import load_index
+from word_games.instrument import instrument
+
+INDEX_KIND = 'boggle'
+INDEX_VERSION = 1
 
 def add_to_words_subtree(words_subtree: Dict, rest_of_word: str) -> Dict:
     """
@@ -23,6 +29,7 @@ def add_to_words_subtree(words_subtree: Dict, rest_of_word: str) -> Dict:
     words_subtree[letter] = add_to_words_subtree(next_subtree, rest_of_word[1:])
     return words_subtree
 
+@instrument
 def read_words(path: str, words: Optional[Dict] = None) -> Dict:
     updated_words = {} if words is None else words
     with open(path, 'r') as f:
@@ -30,3 +37,31 @@ def read_words(path: str, words: Optional[Dict] = None) -> Dict:
             word = replace_special(word_with_return.strip())
             updated_words = add_to_words_subtree(updated_words, word)
     return updated_words
+
+def read_dawg(path: str) -> Dawg:
+    """
+    Like `read_words`, but returns the compact `Dawg`; walk `read_dawg(path).root` like the dict trie.
+    """
+    with open(path, 'r') as f:
+        return build_dawg(replace_special(word_with_return.strip()) for word_with_return in f)
+
+@instrument
+def load_dawg(path: str, index_path: Optional[str] = None, rebuild: bool = False) -> DawgNode:
+    """
+    Memory-maps the prebuilt dawg of the words in `path`, building and saving it first if needed.
+    This takes far less memory than `load_words`, but is about twice as slow to search.
+    """
+    index = load_index(path, INDEX_KIND, INDEX_VERSION, lambda: read_dawg(path).get_sections(), index_path, rebuild)
+    return Dawg.from_index(index).root
+
+@instrument
+def load_words(path: str, index_path: Optional[str] = None, rebuild: bool = False) -> Dict:
+    """
+    The words in `path` as nested dicts, like `read_words` but from the prebuilt dawg, so that the dicts
+    for common endings are shared (see `Dawg.to_dicts`).
+    >>> import os
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_data.txt')
+    >>> load_words(path) == read_words(path)
+    True
+    """
+    return load_dawg(path, index_path, rebuild).dawg.to_dicts()
@@ -0,0 +1,356 @@
+"""
+A compact alternative to the nested-dict trie built by `boggle.compile_words.read_words`, which is also
+how the prebuilt word index is stored (`boggle.compile_words.load_words` turns it back into dicts).
+
+The words are stored as a minimised trie (a DAWG, which shares common suffixes as well as prefixes),
+flattened into a few flat arrays:
+    edge_offsets[n] .. edge_offsets[n + 1]  are the indexes of the edges leaving node n,
+    labels[i]                               is the letter on edge i,
+    edge_targets[i]                         is the node that edge i leads to,
+    terminals[n]                            is 1 if the letters leading to node n make a word.
+Node 0 is the root.
+
+Compare it to the dict trie with:
+    python -m boggle.dawg [path/to/words.txt]
+"""
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from word_games.index_file import IndexFile, pack_uint32s
+
+END = '.'
+
+
+class _BuildNode:
+    __slots__ = ('edges', 'terminal')
+
+    def __init__(self) -> None:
+        self.edges: Dict[str, '_BuildNode'] = {}
+        self.terminal = False
+
+    def signature(self) -> Tuple:
+        # The children are already minimised, so their identity is enough to tell them apart.
+        # The words arrive sorted, so the edges are already in letter order.
+        return (self.terminal, tuple((letter, id(child)) for letter, child in self.edges.items()))
+
+
+def get_common_prefix_length(word: str, other_word: str) -> int:
+    """
+    >>> get_common_prefix_length('cart', 'cat')
+    2
+    >>> get_common_prefix_length('cat', 'dog')
+    0
+    """
+    length = 0
+    for letter, other_letter in zip(word, other_word):
+        if letter != other_letter:
+            break
+        length += 1
+    return length
+
+
+def _build_minimised_nodes(sorted_words: Iterable[str]) -> _BuildNode:
+    # Daciuk et al.'s incremental construction: since the words arrive sorted, once a word diverges from
+    # the previous one, the previous word's tail can never change again, so it can be merged with any
+    # identical node seen before.
+    root = _BuildNode()
+    register: Dict[Tuple, _BuildNode] = {}
+    unchecked: List[Tuple[_BuildNode, str, _BuildNode]] = []
+
+    def minimise(down_to: int) -> None:
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            signature = child.signature()
+            if signature in register:
+                parent.edges[letter] = register[signature]
+            else:
+                register[signature] = child
+
+    previous_word = ''
+    for word in sorted_words:
+        if word == previous_word:
+            continue
+        common_length = get_common_prefix_length(word, previous_word)
+        minimise(common_length)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common_length:]:
+            child = _BuildNode()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.terminal = True
+        previous_word = word
+    minimise(0)
+    return root
+
+
+class Dawg:
+    def __init__(
+        self,
+        edge_offsets: Sequence[int],
+        edge_targets: Sequence[int],
+        labels: str,
+        terminals: Sequence[int],
+    ) -> None:
+        self._edge_offsets = edge_offsets
+        self._edge_targets = edge_targets
+        self._labels = labels
+        self._terminals = terminals
+
+    @property
+    def root(self) -> 'DawgNode':
+        return DawgNode(self, 0)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._terminals)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edge_targets)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the arrays holding the trie."""
+        return 4 * (len(self._edge_offsets) + len(self._edge_targets)) + len(self._labels) + len(self._terminals)
+
+    def get_sections(self) -> List[bytes]:
+        """The sections of the dawg's index file; see `word_games.index_file`."""
+        return [
+            pack_uint32s(self._edge_offsets),
+            pack_uint32s(self._edge_targets),
+            self._labels.encode('utf-8'),
+            bytes(self._terminals),
+        ]
+
+    @classmethod
+    def from_index(cls, index: IndexFile) -> 'Dawg':
+        """
+        Uses the arrays in the (memory-mapped) index in place; only the labels are copied.
+        >>> from word_games.index_file import encode_index, parse_index
+        >>> data = encode_index('boggle', 1, b'x' * 32, build_dawg(['bad', 'bade', 'ace']).get_sections())
+        >>> list(Dawg.from_index(parse_index(data, 'boggle', 1, b'x' * 32)))
+        ['ace', 'bad', 'bade']
+        """
+        return cls(index.uint32s(0), index.uint32s(1), index.text(2), index.section(3))
+
+    def child(self, node: int, letter: str) -> int:
+        """
+        Returns the node reached from `node` along `letter`, or -1 if there is no such edge.
+        >>> dawg = build_dawg(['bad', 'bade', 'ace'])
+        >>> dawg.child(dawg.child(0, 'b'), 'a') > 0
+        True
+        >>> dawg.child(0, 'z'), dawg.child(0, 'd')
+        (-1, -1)
+        """
+        index = self._labels.find(letter, self._edge_offsets[node], self._edge_offsets[node + 1])
+        return -1 if index < 0 else self._edge_targets[index]
+
+    def is_terminal(self, node: int) -> bool:
+        return self._terminals[node] == 1
+
+    def children(self, node: int) -> Iterator[Tuple[str, int]]:
+        """
+        >>> dawg = build_dawg(['bad', 'bade', 'ace'])
+        >>> [letter for letter, _ in dawg.children(0)]
+        ['a', 'b']
+        """
+        for index in range(self._edge_offsets[node], self._edge_offsets[node + 1]):
+            yield self._labels[index], self._edge_targets[index]
+
+    def to_dicts(self) -> Dict:
+        """
+        The words as the nested dicts that `boggle.compile_words.read_words` builds, which are faster to walk.
+        Each node becomes one dict, so the words which end the same way share the dicts of their endings,
+        and they must not be changed.
+        >>> words = build_dawg(['bad', 'bade', 'ace']).to_dicts()
+        >>> words
+        {'a': {'c': {'e': {'.': None}}}, 'b': {'a': {'d': {'.': None, 'e': {'.': None}}}}}
+        >>> words['a']['c']['e'] is words['b']['a']['d']['e']
+        True
+        """
+        dicts: List[Optional[Dict]] = [None] * self.num_nodes
+
+        def get_dict(node: int) -> Dict:
+            node_dict = dicts[node]
+            if node_dict is None:
+                node_dict = {END: None} if self.is_terminal(node) else {}
+                for letter, child in self.children(node):
+                    node_dict[letter] = get_dict(child)
+                dicts[node] = node_dict
+            return node_dict
+
+        return get_dict(0)
+
+    def __contains__(self, word: object) -> bool:
+        """
+        >>> dawg = build_dawg(['bad', 'bade', 'ace'])
+        >>> 'bad' in dawg, 'ba' in dawg, 'bed' in dawg
+        (True, False, False)
+        """
+        if not isinstance(word, str):
+            return False
+        node = 0
+        for letter in word:
+            node = self.child(node, letter)
+            if node < 0:
+                return False
+        return self.is_terminal(node)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        >>> list(build_dawg(['bade', 'bad', 'ace', 'bad']))
+        ['ace', 'bad', 'bade']
+        """
+        stack: List[Tuple[int, str]] = [(0, '')]
+        while stack:
+            node, prefix = stack.pop()
+            if self.is_terminal(node):
+                yield prefix
+            stack.extend((target, prefix + letter) for letter, target in reversed(list(self.children(node))))
+
+
+class DawgNode:
+    """
+    A view of one node of a `Dawg`, which looks up letters like the dict trie does.
+    >>> words = build_dawg(['bad', 'bade', 'ace']).root
+    >>> 'b' in words, 'c' in words
+    (True, False)
+    >>> bad = words['b']['a']['d']
+    >>> '.' in bad, 'e' in bad, '.' in words['b']
+    (True, True, False)
+    >>> sorted(bad.keys())
+    ['.', 'e']
+    """
+    __slots__ = ('dawg', 'node')
+
+    def __init__(self, dawg: Dawg, node: int) -> None:
+        self.dawg = dawg
+        self.node = node
+
+    def __contains__(self, letter: object) -> bool:
+        if letter == END:
+            return self.dawg.is_terminal(self.node)
+        return isinstance(letter, str) and self.dawg.child(self.node, letter) >= 0
+
+    def __getitem__(self, letter: str) -> Optional['DawgNode']:
+        if letter == END and self.dawg.is_terminal(self.node):
+            return None
+        child = self.dawg.child(self.node, letter)
+        if child < 0:
+            raise KeyError(letter)
+        return DawgNode(self.dawg, child)
+
+    def get(self, letter: str, default: Optional[Any] = None) -> Any:
+        child = self.dawg.child(self.node, letter)
+        return default if child < 0 else DawgNode(self.dawg, child)
+
+    def keys(self) -> Iterator[str]:
+        if self.dawg.is_terminal(self.node):
+            yield END
+        yield from (letter for letter, _ in self.dawg.children(self.node))
+
+    def items(self) -> Iterator[Tuple[str, Optional['DawgNode']]]:
+        if self.dawg.is_terminal(self.node):
+            yield END, None
+        yield from ((letter, DawgNode(self.dawg, child)) for letter, child in self.dawg.children(self.node))
+
+
+@lru_cache(maxsize=4)
+def get_heights(dawg: Dawg) -> array:
+    """
+    Returns the length of the longest word ending that can follow each node,
+    eg. to stop searching as soon as a word can no longer reach a given cell.
+    >>> dawg = build_dawg(['bad', 'bade', 'ace'])
+    >>> heights = get_heights(dawg)
+    >>> heights[0], heights[dawg.child(0, 'a')], heights[dawg.child(dawg.child(0, 'a'), 'c')]
+    (4, 2, 1)
+    """
+    heights = array('i', [-1]) * dawg.num_nodes
+
+    def get_height(node: int) -> int:
+        # The recursion only goes as deep as the longest word.
+        if heights[node] < 0:
+            heights[node] = max((get_height(child) + 1 for _, child in dawg.children(node)), default=0)
+        return heights[node]
+
+    get_height(0)
+    return heights
+
+
+def build_dawg(words: Iterable[str]) -> Dawg:
+    """
+    >>> dawg = build_dawg(['cats', 'bats', 'cat', 'bat'])
+    >>> sorted(dawg)
+    ['bat', 'bats', 'cat', 'cats']
+    >>> dawg.num_nodes  # The root, then 'b' and 'c' share the nodes for 'at' and 'ats'.
+    5
+    """
+    root = _build_minimised_nodes(sorted(words))
+    numbers: Dict[int, int] = {id(root): 0}
+    nodes = [root]
+    for node in nodes:  # Breadth first, so `nodes` grows as we go.
+        for child in node.edges.values():
+            if id(child) not in numbers:
+                numbers[id(child)] = len(nodes)
+                nodes.append(child)
+    edge_offsets = array('I', [0])
+    edge_targets = array('I')
+    labels = []
+    for node in nodes:
+        for letter, child in node.edges.items():
+            labels.append(letter)
+            edge_targets.append(numbers[id(child)])
+        edge_offsets.append(len(edge_targets))
+    terminals = bytes(1 if node.terminal else 0 for node in nodes)
+    return Dawg(edge_offsets, edge_targets, ''.join(labels), terminals)
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+    import tracemalloc
+    from boggle.compile_words import read_dawg, read_words
+    from boggle.solve import find_words
+
+    path = sys.argv[1] if len(sys.argv) > 1 else './data/words.txt'
+    rng = random.Random(0)
+    boards = [[''.join(rng.choice('aaeeiioorstlnmdcgpbhu') for _ in range(5)) for _ in range(5)] for _ in range(20)]
+    with open(path, 'r') as f:
+        probes = [line.strip() for line in f][::7]
+
+    results = {}
+    readers = (
+        ('dict trie', lambda: read_words(path)),
+        ('dawg dicts', lambda: read_dawg(path).to_dicts()),
+        ('dawg', lambda: read_dawg(path).root),
+    )
+    for name, reader in readers:
+        start_time = time.perf_counter()
+        reader()
+        build_seconds = time.perf_counter() - start_time
+        # Tracing slows down allocation, so measure the memory on a separate build.
+        tracemalloc.start()
+        trie = reader()
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start_time = time.perf_counter()
+        found = [tuple(find_words(board, trie)) for board in boards]
+        solve_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for word in probes:
+            subtree: Any = trie
+            for letter in word:
+                subtree = subtree.get(letter)
+                if subtree is None:
+                    break
+        lookup_seconds = time.perf_counter() - start_time
+        results[name] = found
+        print(f'{name:>10}: {memory / 1e6:7.1f} MB  built in {build_seconds:6.2f}s  '
+              f'{1000 * solve_seconds / len(boards):6.2f} ms per 5x5 board  '
+              f'{1e6 * lookup_seconds / len(probes):5.2f} µs per word lookup')
+    assert results['dict trie'] == results['dawg dicts'] == results['dawg']
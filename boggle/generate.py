@@ -0,0 +1,318 @@
+"""
+Generate random Boggle boards, or search for the boards with the highest total score.
+
+Run with eg.:
+    python -m boggle.generate --size 4 --count 5 --seed 1
+    python -m boggle.generate --size 5 --search --chains 8 --iterations 2000 --seed 1
+"""
+import math
+import random
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from boggle.boggle_types import Board
+from boggle.compile_words import load_dawg
+from boggle.dawg import DawgNode, get_heights
+from boggle.result import get_restored_length
+from boggle.search import CellPath, find_cell_paths, get_neighbor_table
+
+Dice = Sequence[str]
+
+# Each string is the six faces of one die, with Q standing for Qu.
+DICE_SETS: Dict[str, Dice] = {
+    'classic': (
+        'aaeegn', 'abbjoo', 'achops', 'affkps', 'aoottw', 'cimotu', 'deilrx', 'delrvy',
+        'distty', 'eeghnw', 'eeinsu', 'ehrtvw', 'eiosst', 'elrtty', 'himnqu', 'hlnnrz',
+    ),
+    'big': (
+        'aaafrs', 'aaeeee', 'aafirs', 'adennn', 'aeeeem', 'aeegmu', 'aegmnn', 'afirsy', 'bjkqxz',
+        'ccnstw', 'ceiilt', 'ceilpt', 'ceipst', 'ddlnor', 'dhhlor', 'dhhnot', 'dhlnor', 'eiiitt',
+        'emottt', 'ensssu', 'fiprsy', 'gorrvw', 'hiprry', 'nootuw', 'ooottu',
+    ),
+}
+
+# The points for each word length, as in Boggle; longer words score the same as the last entry.
+WORD_SCORES = (0, 0, 0, 1, 1, 2, 3, 5, 11)
+
+
+def read_dice(path: str) -> Dice:
+    """
+    Reads a dice set from a file with the faces of one die per line, eg. "aaeegn".
+    """
+    with open(path, 'r') as f:
+        return tuple(line.strip().lower() for line in f if line.strip())
+
+
+def get_dice(name: str, size: int) -> Dice:
+    """
+    Returns enough dice for a board of size x size. The 'classic' set is for 4x4 boards and 'big' for 5x5;
+    for larger boards, the dice of the set are reused.
+    >>> len(get_dice('big', 6)), get_dice('big', 6)[25] == get_dice('big', 6)[0]
+    (36, True)
+    """
+    dice = DICE_SETS[name] if name in DICE_SETS else read_dice(name)
+    return tuple(dice[i % len(dice)] for i in range(size * size))
+
+
+def get_default_dice_name(size: int) -> str:
+    return 'classic' if size <= 4 else 'big'
+
+
+def generate_board(dice: Dice, size: int, rng: random.Random) -> List[str]:
+    """
+    Shakes the dice into a size x size board.
+    >>> generate_board(get_dice('classic', 4), 4, random.Random(1))
+    ['aneq', 'duks', 'yhra', 'oeea']
+    """
+    shuffled = list(dice)
+    rng.shuffle(shuffled)
+    letters = [rng.choice(die) for die in shuffled]
+    return [''.join(letters[row * size:(row + 1) * size]) for row in range(size)]
+
+
+def get_word_score(replaced_word: str) -> int:
+    """
+    >>> get_word_score('cat'), get_word_score('qit'), get_word_score('cattle'), get_word_score('attackers')
+    (1, 1, 3, 11)
+    """
+    return WORD_SCORES[min(get_restored_length(replaced_word), len(WORD_SCORES) - 1)]
+
+
+@lru_cache(maxsize=None)
+def get_distance_table(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    The number of moves between each pair of cells of a size x size board.
+    >>> get_distance_table(3)[0]
+    (0, 1, 2, 1, 1, 2, 2, 2, 2)
+    """
+    return tuple(
+        tuple(max(abs(cell // size - other // size), abs(cell % size - other % size)) for other in range(size * size))
+        for cell in range(size * size)
+    )
+
+
+class BoardScorer:
+    """
+    Keeps the total score of a square board up to date as its cells change.
+    It remembers the path of cells spelling each word, so that when a cell changes, only the paths through
+    that cell need to be found again; and that search gives up on a path as soon as the letters still
+    to come in the dictionary are too few to reach the changed cell.
+    >>> from boggle.dawg import build_dawg
+    >>> words = build_dawg(['bad', 'bade', 'dab', 'ace']).root
+    >>> scorer = BoardScorer(['abz', 'cdz', 'efz'], words, min_word_length=3)
+    >>> scorer.score, sorted(scorer.get_words())
+    (4, ['ace', 'bad', 'bade', 'dab'])
+    >>> scorer.change_cell(6, 'x'), scorer.score, sorted(scorer.get_words())
+    (-2, 2, ['bad', 'dab'])
+    >>> scorer.change_cell(6, 'e'), scorer.score == BoardScorer(scorer.board, words, 3).score
+    (2, True)
+    """
+    def __init__(self, board: Board, words: DawgNode, min_word_length: int) -> None:
+        self.size = len(board)
+        self.letters = [letter for row in board for letter in row]
+        self.min_word_length = min_word_length
+        self.evaluations = 1
+        self.score = 0
+        self._words = words
+        self._heights = get_heights(words.dawg)
+        self._neighbor_table = get_neighbor_table(tuple(len(row) for row in board))
+        self._distance_table = get_distance_table(self.size)
+        self._word_counts: Counter = Counter()  # The number of paths spelling each word.
+        self._paths_by_cell: List[Set[CellPath]] = [set() for _ in self.letters]
+        self._add_paths(path for path in find_cell_paths(board, words) if len(path) >= min_word_length)
+
+    @property
+    def board(self) -> List[str]:
+        return [''.join(self.letters[row * self.size:(row + 1) * self.size]) for row in range(self.size)]
+
+    def get_words(self) -> List[str]:
+        return list(self._word_counts)
+
+    def _get_word(self, path: CellPath) -> str:
+        return ''.join(self.letters[cell] for cell in path)
+
+    def _add_paths(self, paths: Iterable[CellPath]) -> None:
+        for path in paths:
+            word = self._get_word(path)
+            if word not in self._word_counts:
+                self.score += get_word_score(word)
+            self._word_counts[word] += 1
+            for cell in path:
+                self._paths_by_cell[cell].add(path)
+
+    def _remove_paths(self, paths: Iterable[CellPath]) -> None:
+        for path in paths:
+            word = self._get_word(path)
+            self._word_counts[word] -= 1
+            if self._word_counts[word] == 0:
+                del self._word_counts[word]
+                self.score -= get_word_score(word)
+            for cell in path:
+                self._paths_by_cell[cell].discard(path)
+
+    def _find_paths_through(self, target: int) -> List[CellPath]:
+        dawg = self._words.dawg
+        child_of, is_terminal, heights = dawg.child, dawg.is_terminal, self._heights
+        letters, neighbor_table, distances = self.letters, self._neighbor_table, self._distance_table[target]
+        min_word_length = self.min_word_length
+        found: List[CellPath] = []
+        path: List[int] = []
+
+        def visit(cell: int, used: int, node: int) -> None:
+            if used >> target & 1:
+                if is_terminal(node) and len(path) >= min_word_length:
+                    found.append(tuple(path))
+            elif distances[cell] > heights[node]:
+                return
+            for neighbor in neighbor_table[cell]:
+                if not used >> neighbor & 1:
+                    child = child_of(node, letters[neighbor])
+                    if child >= 0:
+                        path.append(neighbor)
+                        visit(neighbor, used | 1 << neighbor, child)
+                        path.pop()
+
+        for cell in range(len(letters)):
+            child = child_of(self._words.node, letters[cell])
+            if child >= 0:
+                path.append(cell)
+                visit(cell, 1 << cell, child)
+                path.pop()
+        return found
+
+    def change_cell(self, cell: int, letter: str) -> int:
+        """
+        Changes the letter in a cell (numbered row by row), returning the change in the score.
+        """
+        old_score = self.score
+        self._remove_paths(list(self._paths_by_cell[cell]))
+        self.letters[cell] = letter
+        self._add_paths(self._find_paths_through(cell))
+        self.evaluations += 1
+        return self.score - old_score
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    seed: int
+    board: List[str]
+    score: int
+    evaluations: int
+    seconds: float
+
+
+def anneal(
+    words: DawgNode,
+    dice: Dice,
+    size: int,
+    seed: int,
+    iterations: int,
+    min_word_length: int,
+    start_temperature: float = 10.0,
+    end_temperature: float = 0.5,
+) -> SearchResult:
+    """
+    Searches for a high-scoring board by simulated annealing, starting from a random board.
+    Each step either rolls one die again, or swaps two dice.
+    """
+    start_time = time.perf_counter()
+    rng = random.Random(seed)
+    cell_dice = list(dice)
+    rng.shuffle(cell_dice)
+    board = [''.join(rng.choice(die) for die in cell_dice[row * size:(row + 1) * size]) for row in range(size)]
+    scorer = BoardScorer(board, words, min_word_length)
+    best_board, best_score = scorer.board, scorer.score
+    for iteration in range(iterations):
+        temperature = start_temperature * (end_temperature / start_temperature) ** (iteration / max(iterations - 1, 1))
+        if rng.random() < 0.5:
+            cell = rng.randrange(size * size)
+            moves = [(cell, rng.choice(cell_dice[cell]), cell_dice[cell])]
+        else:
+            cell, other = rng.sample(range(size * size), 2)
+            moves = [(cell, scorer.letters[other], cell_dice[other]), (other, scorer.letters[cell], cell_dice[cell])]
+        undo = [(cell, scorer.letters[cell], cell_dice[cell]) for cell, _, _ in moves]
+        delta = 0
+        for cell, letter, die in moves:
+            cell_dice[cell] = die
+            delta += scorer.change_cell(cell, letter)
+        if delta < 0 and rng.random() >= math.exp(delta / temperature):
+            for cell, letter, die in reversed(undo):
+                cell_dice[cell] = die
+                scorer.change_cell(cell, letter)
+        elif scorer.score > best_score:
+            best_board, best_score = scorer.board, scorer.score
+    return SearchResult(seed, best_board, best_score, scorer.evaluations, time.perf_counter() - start_time)
+
+
+_worker_words: Optional[DawgNode] = None
+
+
+def _load_worker_words(path: str) -> None:
+    global _worker_words
+    _worker_words = load_dawg(path)
+
+
+def _anneal_in_worker(dice: Dice, size: int, seed: int, iterations: int, min_word_length: int) -> SearchResult:
+    assert _worker_words is not None
+    return anneal(_worker_words, dice, size, seed, iterations, min_word_length)
+
+
+def search_boards(
+    path: str,
+    dice: Dice,
+    size: int,
+    seed: int,
+    chains: int,
+    iterations: int,
+    min_word_length: int,
+    workers: Optional[int] = None,
+) -> List[SearchResult]:
+    """
+    Runs independent annealing chains (seeded with seed, seed + 1, ...) across worker processes.
+    The results only depend on the seed, not on the number of workers.
+    """
+    _load_worker_words(path)  # Build the index once, before the workers start.
+    seeds = range(seed, seed + chains)
+    if workers == 1:
+        return [_anneal_in_worker(dice, size, chain_seed, iterations, min_word_length) for chain_seed in seeds]
+    with ProcessPoolExecutor(workers, initializer=_load_worker_words, initargs=(path,)) as executor:
+        futures = [executor.submit(_anneal_in_worker, dice, size, chain_seed, iterations, min_word_length)
+                   for chain_seed in seeds]
+        return [future.result() for future in futures]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Generate Boggle boards, or search for high-scoring ones.')
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--dice', help='"classic", "big", or a file with the faces of one die per line')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--count', type=int, default=1, help='The number of random boards to generate')
+    parser.add_argument('--search', action='store_true', help='Search for the highest scoring board instead')
+    parser.add_argument('--chains', type=int, default=4, help='The number of independent searches')
+    parser.add_argument('--iterations', type=int, default=1000, help='The number of steps in each search')
+    parser.add_argument('--workers', type=int, help='The number of worker processes')
+    parser.add_argument('--words', default='./data/words.txt', help='The word list')
+    args = parser.parse_args()
+
+    dice = get_dice(args.dice or get_default_dice_name(args.size), args.size)
+    if not args.search:
+        rng = random.Random(args.seed)
+        for _ in range(args.count):
+            print(','.join(generate_board(dice, args.size, rng)))
+        exit()
+
+    min_word_length = 3 if args.size <= 4 else 4
+    start_time = time.perf_counter()
+    results = search_boards(args.words, dice, args.size, args.seed, args.chains, args.iterations, min_word_length,
+                            args.workers)
+    seconds = time.perf_counter() - start_time
+    for result in sorted(results, key=lambda r: r.score, reverse=True):
+        print(f'seed {result.seed:4}: {result.score:5} points  {",".join(result.board)}  '
+              f'({result.evaluations / result.seconds:,.0f} boards/s)')
+    evaluations = sum(result.evaluations for result in results)
+    print(f'\nEvaluated {evaluations:,} boards in {seconds:.1f}s: {evaluations / seconds:,.0f} boards per second')
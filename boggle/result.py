@@ -0,0 +1,106 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from boggle.boggle_types import Board, Position, WordsSubtree
+from boggle.replacements import replace_special, restore_special
+from boggle.search import find_cell_paths, get_cell_positions
+
+
+def get_restored_length(replaced_word: str) -> int:
+    """
+    The length of the word once `restore_special` turns each 'q' back into 'qu'.
+    >>> get_restored_length('qit'), get_restored_length('√at')
+    (4, 3)
+    """
+    return len(replaced_word) + replaced_word.count('q')
+
+
+class BoggleResult:
+    """
+    The words found on a board, each kept once, in the order they were first found.
+    Words are stored as the solver spells them, and only restored (eg. 'qit' to 'quit') when asked for.
+    >>> result = BoggleResult(min_word_length=3, keep_paths=True)
+    >>> [result.add(word, ((0, 0, word[0]),)) for word in ('qit', 'bad', 'qit', 'ba', 'bade')]
+    [True, True, False, False, True]
+    >>> result.words, len(result), 'quit' in result
+    (['quit', 'bad', 'bade'], 3, True)
+    >>> sorted(result.counts.items())
+    [(3, 1), (4, 2)]
+    >>> result.get_path('quit')
+    ((0, 0, 'q'),)
+    """
+    def __init__(self, min_word_length: int = 0, keep_paths: bool = False) -> None:
+        self.min_word_length = min_word_length
+        self.keep_paths = keep_paths
+        self.counts: Counter = Counter()  # The number of words of each (restored) length.
+        self._paths: Dict[str, Optional[Tuple[Position, ...]]] = {}
+        self._words: Optional[List[str]] = None
+
+    @classmethod
+    def from_board(cls, board: Board, words: WordsSubtree, min_word_length: int = 0, keep_paths: bool = False) -> 'BoggleResult':
+        """
+        >>> words = {'b': {'a': {'d': {'.': None, 'e': {'.': None}}}}, 'a': {'c': {'e': {'.': None}}}}
+        >>> BoggleResult.from_board(('ab', 'cd', 'ef'), words, min_word_length=4).words
+        ['bade']
+        """
+        result = cls(min_word_length, keep_paths)
+        positions = get_cell_positions(board)
+        for cell_path in find_cell_paths(board, words):
+            word = ''.join(positions[cell][2] for cell in cell_path)
+            # Only build the path of the first way each word is found.
+            new_path = keep_paths and word not in result._paths
+            result.add(word, tuple(positions[cell] for cell in cell_path) if new_path else None)
+        return result
+
+    def move_cells(self, cells: Mapping[Tuple[int, int], Tuple[int, int]]) -> 'BoggleResult':
+        """
+        A copy of the result, with the cells of each path moved, eg. back from a turned board to the board itself.
+        >>> result = BoggleResult(keep_paths=True)
+        >>> result.add('ab', ((0, 0, 'a'), (0, 1, 'b')))
+        True
+        >>> result.move_cells({(0, 0): (1, 0), (0, 1): (0, 0)}).get_path('ab')
+        ((1, 0, 'a'), (0, 0, 'b'))
+        """
+        result = BoggleResult(self.min_word_length, self.keep_paths)
+        result.counts = self.counts.copy()
+        result._paths = {
+            word: tuple((*cells[(row, col)], letter) for row, col, letter in path) if path is not None else None
+            for word, path in self._paths.items()
+        }
+        return result
+
+    def add(self, replaced_word: str, path: Optional[Tuple[Position, ...]] = None) -> bool:
+        """
+        Adds the word if it is long enough and new, returning whether it was added.
+        """
+        if len(replaced_word) < self.min_word_length or replaced_word in self._paths:
+            return False
+        self._paths[replaced_word] = path if self.keep_paths else None
+        self.counts[get_restored_length(replaced_word)] += 1
+        self._words = None
+        return True
+
+    @property
+    def words(self) -> List[str]:
+        if self._words is None:
+            self._words = [restore_special(word) for word in self._paths]
+        return self._words
+
+    @property
+    def replaced_words(self) -> List[str]:
+        return list(self._paths)
+
+    def get_path(self, word: str) -> Optional[Tuple[Position, ...]]:
+        """
+        The positions of the letters of one way to spell `word` on the board (if the paths were kept).
+        """
+        return self._paths.get(replace_special(word))
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and replace_special(word) in self._paths
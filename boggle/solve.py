@@ -1,14 +1,29 @@
 """
 Run with:
-    python -m boggle.boggle
+    python -m boggle.solve
+
+Or to solve a file of boards (one per line, with commas between rows) and print the words as JSON lines:
+    python -m boggle.solve --batch boards.txt
 """
-from boggle.replacements import get_replacement_messages, restore_special
-from boggle.compile_words import read_words
-from typing import Sequence, Tuple, Iterator, Dict
+from boggle.replacements import get_replacement_messages
+from boggle.compile_words import load_dawg, load_words
+from boggle.result import BoggleResult
+from boggle.symmetry import get_canonical_board, get_cells_back
+from word_games.cache import TieredCache
+from word_games.instrument import PROFILE_HELP, instrument, profiled
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
 from math import floor
-from collections import Counter
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice, tee
+from argparse import ArgumentParser, Namespace
+import json
+import os
+import sys
+
+from boggle.boggle_types import Position, Board, WordsSubtree
 
-from boggle.boggle_types import Position, Board
+DEFAULT_PATH = './data/words.txt'
 
 def get_all_positions(board: Board) -> Iterator[Position]:
     """
@@ -44,7 +59,7 @@ def get_word_from_trail(trail: Tuple[Position, ...]) -> str:
     """
     return ''.join(position[2] for position in trail)
 
-def find_words(board: Board, words_subtree: Dict, trail: Tuple[Position, ...] = None) -> Iterator[str]:
+def find_words(board: Board, words_subtree: WordsSubtree, trail: Tuple[Position, ...] = None) -> Iterator[str]:
     """
     >>> board = ('ab','cd','ef')
     >>> words = {'b': {'a': {'d': {'.': None, 'e': {'.': None}}}}, 'a': {'c': {'e': {'.': None}}}}
@@ -53,6 +68,9 @@ def find_words(board: Board, words_subtree: Dict, trail: Tuple[Position, ...] =
     >>> board = ('ab','cd','fg')
     >>> tuple(find_words(board, words))
     ('bad',)
+    >>> from boggle.dawg import build_dawg
+    >>> tuple(find_words(('ab','cd','ef'), build_dawg(['bad', 'bade', 'ace']).root))
+    ('ace', 'bad', 'bade')
     """
     if trail is None:
         trail = ()
@@ -71,11 +89,118 @@ def pretty_print(words: Sequence[str], width: int = 120) -> None:
     print('\n'.join(''.join(word.rjust(space) for word in sublist) for sublist in diced_words))
     print()
 
-if __name__ == '__main__':
+def parse_board(text: str) -> List[str]:
+    """
+    >>> parse_board('Rac, gtA,')
+    ['rac', 'gta']
+    """
+    return [row for row in text.lower().replace(' ', '').strip().split(',') if row]
+
+def get_min_word_length(board: Board) -> int:
+    """
+    >>> get_min_word_length(['abcd', 'efgh', 'ijkl', 'mnop']), get_min_word_length(['abcde'] * 5)
+    (3, 4)
+    """
+    return 3 if len(''.join(board)) <= 20 else 4
+
+@instrument
+def solve_board(board: Board, words: WordsSubtree, min_word_length: Optional[int] = None, keep_paths: bool = False,
+                cache: Optional[TieredCache] = None) -> BoggleResult:
+    """
+    Finds each word on the board once.
+    With a cache (which should only be used with one word list), each board is solved once for all the ways
+    it can be turned or flipped. The words then come in the order they were found on the canonical board,
+    and the paths are moved back onto this board. Boards whose rows are not all the same length cannot be
+    turned, so they are solved without the cache.
+    >>> words = {'q': {'i': {'t': {'.': None}}}, 'b': {'a': {'d': {'.': None, 'e': {'.': None}}}}}
+    >>> solve_board(['qie', 'tad', 'xbx'], words).words
+    ['quit', 'bad', 'bade']
+    >>> solve_board(['qie', 'tad', 'xbx'], words, min_word_length=4).words  # A Qu only counts as one letter.
+    ['bade']
+    >>> from word_games.cache import LRUCache
+    >>> cache = TieredCache(LRUCache(100))
+    >>> solve_board(['qie', 'tad', 'xbx'], words, keep_paths=True, cache=cache).get_path('bade')
+    ((2, 1, 'b'), (1, 1, 'a'), (1, 2, 'd'), (0, 2, 'e'))
+    >>> turned = solve_board(['xtq', 'bai', 'xde'], words, keep_paths=True, cache=cache)
+    >>> turned.get_path('bade'), sorted(turned.words), cache.stats.hit_rate
+    (((1, 0, 'b'), (1, 1, 'a'), (2, 1, 'd'), (2, 2, 'e')), ['bad', 'bade', 'quit'], 0.5)
+    >>> solve_board(['xb', 'adx'], words, cache=cache).words == solve_board(['xb', 'adx'], words).words == ['bad']
+    True
+    """
+    if min_word_length is None:
+        min_word_length = get_min_word_length(board)
+    if cache is None or len({len(row) for row in board}) > 1:
+        return BoggleResult.from_board(board, words, min_word_length, keep_paths)
+    canonical_board, symmetry = get_canonical_board(board)
+    result = cache.get_or_put(
+        (canonical_board, min_word_length, keep_paths),
+        lambda: BoggleResult.from_board(canonical_board, words, min_word_length, keep_paths),
+    )
+    return result.move_cells(get_cells_back(board, symmetry))
+
+_worker_words: Optional[WordsSubtree] = None
+
+def _load_worker_words(path: str, compact: bool = False) -> None:
+    global _worker_words
+    _worker_words = load_dawg(path) if compact else load_words(path)
+
+def _solve_boards(boards: Sequence[Board], min_word_length: Optional[int]) -> List[BoggleResult]:
+    assert _worker_words is not None
+    return [solve_board(board, _worker_words, min_word_length) for board in boards]
+
+def solve_many(
+    boards: Iterable[Board],
+    min_word_length: Optional[int] = None,
+    path: str = DEFAULT_PATH,
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+    compact: bool = False,
+) -> Iterator[BoggleResult]:
+    """
+    Solves the boards across a pool of worker processes, yielding the result of each board in order,
+    as soon as they are ready. Each worker loads the same prebuilt word index, and with `compact`,
+    searches the memory-mapped dawg rather than the dicts made from it.
+    If `workers` is 1, the boards are solved in this process instead.
+    >>> import os
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_data.txt')
+    >>> [result.words for result in solve_many([['cat', 'ode'], ['dog', 'xxx'], ['tac', 'edo']], path=path, workers=2, chunk_size=1)]
+    [['code', 'cat'], ['dog'], ['cat', 'code']]
+    """
+    # Only keep a few chunks in flight, so that a long stream of boards is never all held at once.
+    iter_boards = iter(boards)
+    chunks = iter(lambda: list(islice(iter_boards, chunk_size)), [])
+    # Load the words here first, so that the index is built once, rather than by every worker.
+    _load_worker_words(path, compact)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _solve_boards(chunk, min_word_length)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_load_worker_words, initargs=(path, compact)) as executor:
+        max_pending = 2 * workers
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_solve_boards, chunk, min_word_length))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def solve_stream(lines: Iterable[str], min_word_length: Optional[int], path: str, workers: Optional[int],
+                 compact: bool = False) -> None:
+    boards, boards_to_print = tee(parse_board(line) for line in lines if line.strip())
+    for board, result in zip(boards_to_print, solve_many(boards, min_word_length, path, workers, compact=compact)):
+        print(json.dumps({'board': board, 'count': len(result), 'words': result.words}), flush=True)
+
+def main(args: Namespace) -> None:
+    if args.batch:
+        with (sys.stdin if args.batch == '-' else open(args.batch, 'r')) as f:
+            solve_stream(f, args.min_word_length, args.words, args.workers, args.compact)
+        exit()
+
     # board = ["rfsem", "rfsem", "tsaoj", "tilft", "octhr"]
     # Eg. Enter: rfsem,rante,tsaoj,tilft,octhr
-    path = './data/words.txt'
-    words = read_words(path)
+    words = load_dawg(args.words) if args.compact else load_words(args.words)
     replacement_messages = get_replacement_messages()
     print()
     print('\n'.join(replacement_messages))
@@ -86,23 +211,32 @@ if __name__ == '__main__':
         if board_size < 2:
             print('Goodbye!')
             exit()
-        min_word_length = 3 if board_size <= 20 else 4
+        min_word_length = args.min_word_length or get_min_word_length(board)
         print()
         for row in board:
             print(f'\t\t{row.upper()}')
-        found_words = tuple(word for word in find_words(board, words) if len(word) >= min_word_length)
-        found_unique_words = tuple(
-            restore_special(word)
-            for i, word in enumerate(found_words)
-            if i == 0 or word not in found_words[:i]
-        )
-
-        counts = Counter([len(word) for word in found_unique_words])
+        result = solve_board(board, words, min_word_length)
+
         print()
-        print('  |  '.join(f'{l} letters: {count}' for l, count in sorted(counts.items())))
+        print('  |  '.join(f'{l} letters: {count}' for l, count in sorted(result.counts.items())))
         print()
-        if found_unique_words:
-            pretty_print(found_unique_words)
-            print(f'Total: {len(found_unique_words)} words\n')
+        if result:
+            pretty_print(result.words)
+            print(f'Total: {len(result)} words\n')
         else:
             print('No words found!')
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Find all the words in a Boggle board.')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Solve the boards in FILE (or - for stdin), one per line, and print JSON lines')
+    parser.add_argument('--min-word-length', type=int, help='Defaults to 3 for up to 20 letters, and 4 otherwise')
+    parser.add_argument('--workers', type=int, help='The number of worker processes for --batch')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    parser.add_argument('--compact', action='store_true',
+                        help='Search the memory-mapped dawg, which takes far less memory but is about twice as slow')
+    parser.add_argument('--profile', metavar='FILE', help=PROFILE_HELP)
+    args = parser.parse_args()
+
+    with profiled(args.profile):
+        main(args)
@@ -0,0 +1,62 @@
+"""
+The 8 ways to turn or flip a board. Letters are next to the same letters on each of them, so they all hold
+the same words, and a board's words only need to be found once for all 8, by solving its canonical board
+(the one whose rows come first in alphabetical order). The boards must be rectangular.
+"""
+from typing import Dict, List, Tuple
+
+from boggle.boggle_types import Board
+
+Cell = Tuple[int, int]
+SYMMETRIES = range(8)
+
+
+def transform_cell(cell: Cell, symmetry: int, height: int, width: int) -> Cell:
+    """
+    Where the cell goes on the board turned or flipped by the symmetry (0 leaves it where it is):
+    bit 1 flips the rows, bit 2 flips the columns, and bit 4 then swaps rows for columns.
+    >>> [transform_cell((0, 1), symmetry, 2, 3) for symmetry in SYMMETRIES]
+    [(0, 1), (1, 1), (0, 1), (1, 1), (1, 0), (1, 1), (1, 0), (1, 1)]
+    """
+    row, col = cell
+    if symmetry & 1:
+        row = height - 1 - row
+    if symmetry & 2:
+        col = width - 1 - col
+    return (col, row) if symmetry & 4 else (row, col)
+
+
+def transform_board(board: Board, symmetry: int) -> Tuple[str, ...]:
+    """
+    >>> [transform_board(['abc', 'def'], symmetry) for symmetry in (0, 1, 4, 7)]
+    [('abc', 'def'), ('def', 'abc'), ('ad', 'be', 'cf'), ('fc', 'eb', 'da')]
+    """
+    height, width = len(board), len(board[0])
+    new_board: List[List[str]] = [[''] * (height if symmetry & 4 else width) for _ in range(width if symmetry & 4 else height)]
+    for row, letters in enumerate(board):
+        for col, letter in enumerate(letters):
+            new_row, new_col = transform_cell((row, col), symmetry, height, width)
+            new_board[new_row][new_col] = letter
+    return tuple(''.join(letters) for letters in new_board)
+
+
+def get_canonical_board(board: Board) -> Tuple[Tuple[str, ...], int]:
+    """
+    The canonical board, and the symmetry which turns the board into it.
+    >>> get_canonical_board(['fc', 'eb', 'da']), get_canonical_board(['abc', 'def'])
+    ((('abc', 'def'), 7), (('abc', 'def'), 0))
+    """
+    return min((transform_board(board, symmetry), symmetry) for symmetry in SYMMETRIES)
+
+
+def get_cells_back(board: Board, symmetry: int) -> Dict[Cell, Cell]:
+    """
+    Where each cell of the board turned by the symmetry came from on the board.
+    >>> get_cells_back(['abc', 'def'], 4)[(2, 0)]
+    (0, 2)
+    """
+    height, width = len(board), len(board[0])
+    return {
+        transform_cell((row, col), symmetry, height, width): (row, col)
+        for row in range(height) for col in range(width)
+    }
@@ -1,26 +1,264 @@
-from make5.types import FrequencyDict, WordDict
-from make5.utilities import SYMBOL
-from typing import Any, Dict, Tuple, List
-from make5.crosshair import Crosshair, get_crosshairs
-
-
-def calculate(grid: List[str], letter: str, words: WordDict, frequency: FrequencyDict) -> Dict[Tuple[int, int], Dict[str, Any]]:
-    record: Dict[Tuple[int, int], Dict[str, Any]] = {}
-    for row_index, row_key in enumerate(grid):
-        for col_index in range(len(row_key)):
-            if row_key[col_index] == SYMBOL:
-                col_key = ''.join(row[col_index] for row in grid)
-                crosshairs = get_crosshairs(row_key, col_key, row_index, col_index, None, words, frequency)
-                this_crosshair = [crosshair for crosshair in crosshairs if crosshair.letter == letter][0]
-                other_crosshairs = [crosshair for crosshair in crosshairs if crosshair.letter != letter]
-                sorted_other_crosshairs = sorted(other_crosshairs, key=lambda x: x.score, reverse=True)
-                # for new_letter, new_crosshair in sorted_other_crosshairs[:3]:
-
-                best_increase = this_crosshair.score - sorted_other_crosshairs[1].score
-                record[(row_index, col_index)] = {
-                    'crosshair': this_crosshair,
-                    'best_increase': best_increase,
-                    'best_other_crosshair': sorted_other_crosshairs[0],
-                }
-
-    return record
+"""
+Work out where the new letter is best placed on a grid.
+
+A `GridAnalyzer` keeps the scores of the lines it has seen, so as tiles are placed turn by turn, only the row
+and column through each new tile need to be scored again, eg.
+
+    analyzer = GridAnalyzer(grid, words, frequency)
+    record = analyzer.calculate('e')
+    analyzer.place(2, 3, 'e')
+    record = analyzer.calculate('s')
+
+Every line is scored on its own, so with `workers`, the lines are scored across a pool of worker processes,
+each memory-mapping the same prebuilt word index. The results are the same for any number of workers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from make5.compile_words import load_words
+from make5.types import FrequencyDict, WordIndex
+from make5.utilities import SYMBOL, replace
+from typing import Any, Dict, Iterable, Tuple, List, Optional, Sequence
+from make5.crosshair import ALL_LETTERS, Crosshair, LineScore, score_line
+from word_games.instrument import instrument
+
+DEFAULT_PATH = './data/words.txt'
+
+Line = Tuple[str, int]  # ('row', row_index) or ('col', col_index).
+LineKey = Tuple[str, int]  # The key of the line, and the index of the letter which must be used.
+
+_worker_words: Optional[WordIndex] = None
+_worker_frequency: FrequencyDict = {}
+
+
+def _load_worker_words(path: str, frequency: FrequencyDict) -> None:
+    global _worker_words, _worker_frequency
+    _worker_words = load_words(path)
+    _worker_frequency = frequency
+
+
+def _score_lines(line_keys: Sequence[LineKey]) -> List[LineScore]:
+    assert _worker_words is not None
+    return [score_line(key, required_index, _worker_words, _worker_frequency) for key, required_index in line_keys]
+
+
+class GridAnalyzer:
+    """
+    >>> from make5.utilities import _get_test_words, read_frequencies
+    >>> import os
+    >>> frequency = read_frequencies(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_tiles.txt'))
+    >>> words = _get_test_words()
+    >>> grid = ['?????', '?????', '??og?', '?????', '?????']
+    >>> analyzer = GridAnalyzer(grid, words, frequency)
+    >>> analyzer.calculate('l') == calculate(grid, 'l', words, frequency)
+    True
+    >>> analyzer.place(2, 1, 'l')
+    >>> analyzer.grid[2], analyzer.calculate('s') == calculate(analyzer.grid, 's', words, frequency)
+    ('?log?', True)
+    >>> analyzer.set_grid(['?????', '?????', '?log?', '?????', '???s?'])
+    >>> analyzer.calculate('b') == calculate(analyzer.grid, 'b', words, frequency)
+    True
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_data.txt')
+    >>> with GridAnalyzer(analyzer.grid, words, frequency, workers=2, path=path, chunk_size=16) as parallel:
+    ...     parallel.calculate('b') == analyzer.calculate('b')
+    True
+    """
+    def __init__(self, grid: Sequence[str], words: WordIndex, frequency: FrequencyDict,
+                 workers: Optional[int] = 1, path: str = DEFAULT_PATH, chunk_size: int = 64) -> None:
+        """
+        With `workers` other than 1 (None for one per CPU), new lines are scored in worker processes,
+        which load the word list at `path` (which should be the list `words` came from).
+        """
+        self.words = words
+        self.frequency = frequency
+        self.grid: List[str] = list(grid)
+        self.workers = workers
+        self.path = path
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # The scores of the lines made by putting a letter in a line, kept with the line until it changes.
+        self._line_scores: Dict[Line, Dict[Tuple[str, int], LineScore]] = {}
+        self._crosshairs: Dict[Tuple[int, int], List[Crosshair]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_row_key(self, row_index: int) -> str:
+        return self.grid[row_index]
+
+    def get_col_key(self, col_index: int) -> str:
+        return ''.join(row[col_index] for row in self.grid)
+
+    def _score_line(self, line: Line, key: str, required_index: int) -> LineScore:
+        scores = self._line_scores.setdefault(line, {})
+        line_score = scores.get((key, required_index))
+        if line_score is None:
+            self.misses += 1
+            line_score = score_line(key, required_index, self.words, self.frequency)
+            scores[(key, required_index)] = line_score
+        else:
+            self.hits += 1
+        return line_score
+
+    def _get_line_keys(self, row_index: int, col_index: int) -> Iterable[Tuple[Line, LineKey]]:
+        row_key, col_key = self.get_row_key(row_index), self.get_col_key(col_index)
+        for letter in ALL_LETTERS:
+            yield ('row', row_index), (replace(row_key, col_index, letter), col_index)
+            yield ('col', col_index), (replace(col_key, row_index, letter), row_index)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Load the words here first, so that the index is built once, rather than by every worker.
+            load_words(self.path)
+            self._executor = ProcessPoolExecutor(
+                self.workers, initializer=_load_worker_words, initargs=(self.path, self.frequency))
+        return self._executor
+
+    def score_cells(self, cells: Iterable[Tuple[int, int]]) -> None:
+        """
+        Score the lines through the cells which have not been scored yet, across the worker processes.
+        The scores are put back in the order they were asked for, so the results never depend on the workers.
+        """
+        if self.workers == 1:
+            return
+        to_score: Dict[LineKey, Line] = {}
+        for cell in cells:
+            if cell not in self._crosshairs:
+                for line, line_key in self._get_line_keys(*cell):
+                    if line_key not in self._line_scores.get(line, {}):
+                        to_score.setdefault(line_key, line)
+        if not to_score:
+            return
+        line_keys = list(to_score)
+        chunks = [line_keys[start:start + self.chunk_size] for start in range(0, len(line_keys), self.chunk_size)]
+        executor = self._get_executor()
+        for chunk, line_scores in zip(chunks, executor.map(_score_lines, chunks)):
+            for line_key, line_score in zip(chunk, line_scores):
+                self._line_scores.setdefault(to_score[line_key], {})[line_key] = line_score
+                self.misses += 1
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'GridAnalyzer':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @instrument
+    def get_crosshairs(self, row_index: int, col_index: int) -> List[Crosshair]:
+        """
+        The same as `make5.crosshair.get_crosshairs` for the cell, but reusing the scores of lines seen before.
+        """
+        if (row_index, col_index) not in self._crosshairs:
+            line_scores = [self._score_line(line, *line_key) for line, line_key in self._get_line_keys(row_index, col_index)]
+            self._crosshairs[(row_index, col_index)] = [
+                Crosshair.from_line_scores(letter, row_score, col_score)
+                for letter, row_score, col_score in zip(ALL_LETTERS, line_scores[::2], line_scores[1::2])
+            ]
+        return self._crosshairs[(row_index, col_index)]
+
+    def invalidate(self, row_index: int, col_index: int) -> None:
+        """
+        Forget the scores which depend on the given cell: those of its row and its column.
+        """
+        self._line_scores.pop(('row', row_index), None)
+        self._line_scores.pop(('col', col_index), None)
+        for cell in [cell for cell in self._crosshairs if cell[0] == row_index or cell[1] == col_index]:
+            del self._crosshairs[cell]
+
+    def place(self, row_index: int, col_index: int, letter: str) -> None:
+        row = self.grid[row_index]
+        self.grid[row_index] = row[:col_index] + letter + row[col_index + 1:]
+        self.invalidate(row_index, col_index)
+
+    def set_grid(self, grid: Sequence[str]) -> None:
+        """
+        Move on to a new grid, eg. as entered for the next turn, keeping the scores of the lines which have not changed.
+        """
+        grid = list(grid)
+        if len(grid) != len(self.grid) or any(len(row) != len(old_row) for row, old_row in zip(grid, self.grid)):
+            self.grid = grid
+            self._line_scores.clear()
+            self._crosshairs.clear()
+            return
+        changed = [
+            (row_index, col_index)
+            for row_index, (row, old_row) in enumerate(zip(grid, self.grid))
+            for col_index, (letter, old_letter) in enumerate(zip(row, old_row)) if letter != old_letter
+        ]
+        self.grid = grid
+        for row_index, col_index in changed:
+            self.invalidate(row_index, col_index)
+
+    def get_empty_cells(self) -> List[Tuple[int, int]]:
+        return [
+            (row_index, col_index)
+            for row_index, row_key in enumerate(self.grid)
+            for col_index, letter in enumerate(row_key) if letter == SYMBOL
+        ]
+
+    def calculate(self, letter: str) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        self.score_cells(self.get_empty_cells())
+        record: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for row_index, row_key in enumerate(self.grid):
+            for col_index in range(len(row_key)):
+                if row_key[col_index] == SYMBOL:
+                    crosshairs = self.get_crosshairs(row_index, col_index)
+                    this_crosshair = [crosshair for crosshair in crosshairs if crosshair.letter == letter][0]
+                    other_crosshairs = [crosshair for crosshair in crosshairs if crosshair.letter != letter]
+                    sorted_other_crosshairs = sorted(other_crosshairs, key=lambda x: x.score, reverse=True)
+
+                    best_increase = this_crosshair.score - sorted_other_crosshairs[1].score
+                    record[(row_index, col_index)] = {
+                        'crosshair': this_crosshair,
+                        'best_increase': best_increase,
+                        'best_other_crosshair': sorted_other_crosshairs[0],
+                    }
+
+        return record
+
+
+def calculate(grid: List[str], letter: str, words: WordIndex, frequency: FrequencyDict,
+              analyzer: Optional[GridAnalyzer] = None, workers: Optional[int] = 1,
+              path: str = DEFAULT_PATH) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """
+    Pass the analyzer from the previous turn to reuse the scores of the lines which have not changed since.
+    Otherwise, with `workers` other than 1, the lines are scored across that many worker processes
+    (which load the word list at `path`).
+    """
+    if analyzer is not None:
+        analyzer.set_grid(grid)
+        return analyzer.calculate(letter)
+    with GridAnalyzer(grid, words, frequency, workers, path) as new_analyzer:
+        return new_analyzer.calculate(letter)
+
+
+if __name__ == '__main__':
+    import time
+    from argparse import ArgumentParser
+    from make5.utilities import read_frequencies
+
+    parser = ArgumentParser(description='Time the analysis of a grid with different numbers of worker processes.')
+    parser.add_argument('grid', nargs='?', default='.......,..r....,.stone.,...a...,..c.r..,..e....,.......',
+                        help='The rows of the grid, with commas between rows, and . for empty')
+    parser.add_argument('--letter', default='e')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='The numbers of workers to try')
+    parser.add_argument('--tiles', default='./make5/tiles.txt', help='The frequency of each tile')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    args = parser.parse_args()
+
+    grid = args.grid.lower().replace('.', SYMBOL).split(',')
+    words = load_words(args.words)
+    frequency = read_frequencies(args.tiles)
+    expected = None
+    for workers in args.workers:
+        # Each run starts with nothing in memory, but the full-length combos on disk are shared by all the runs.
+        with GridAnalyzer(grid, words, frequency, workers, args.words) as analyzer:
+            start_time = time.perf_counter()
+            record = analyzer.calculate(args.letter)
+            seconds = time.perf_counter() - start_time
+        if expected is None:
+            expected = record
+        print(f'{workers:3} worker(s): {analyzer.misses:,} lines in {seconds:.2f}s '
+              f'({analyzer.misses / seconds:,.0f} lines per second){"" if record == expected else " DIFFERENT RESULTS"}')
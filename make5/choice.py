@@ -1,7 +1,10 @@
-from typing import Sequence, Union
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from make5.utilities import SYMBOL, get_chance, get_subwords, get_full_length_combos
-from make5.types import FrequencyDict, WordDict
+from make5.types import FrequencyDict, WordIndex
 from make5.score import get_score
+from word_games.cache import TieredCache
+from word_games.instrument import instrument
 
 
 def pad_word(start_index: int, word: str, max_length: int, pad_symbol = '.'):
@@ -15,18 +18,111 @@ def pad_word(start_index: int, word: str, max_length: int, pad_symbol = '.'):
 
 
 class Choice:
-    def __init__(self, word: str, key: str, start_index: int, words: WordDict, frequency: FrequencyDict, max_length: int = 5) -> None:
+    def __init__(self, word: str, key: str, start_index: int, words: WordIndex, frequency: FrequencyDict, max_length: int = 5) -> None:
         self.word = word
         self.key = key
         self.max_length = max_length
         self.start_index = start_index
-        self.subwords = tuple(r[1] for r in get_subwords(words, word))
-        self.score = sum(get_score(w, max_length) for w in self.subwords)
-        self.chance = 1 - (1 - get_chance(key, word, frequency)) ** (max_length * max_length)  # Improve
+        self.subwords, self.score = get_subword_score(words, word, max_length)
+        self.chance = get_board_chance(key, word, frequency, max_length)
         self.adjusted_score = self.chance * self.score
 
+    @classmethod
+    def from_scores(cls, word: str, key: str, subwords: Tuple[str, ...], score: int, chance: float, max_length: int = 5) -> 'Choice':
+        choice = cls.__new__(cls)
+        choice.word = word
+        choice.key = key
+        choice.max_length = max_length
+        choice.start_index = 0
+        choice.subwords = subwords
+        choice.score = score
+        choice.chance = chance
+        choice.adjusted_score = chance * score
+        return choice
 
-def get_sorted_choices(key: str, required_index: Union[int, None], words: WordDict, frequency: FrequencyDict) -> Sequence[Choice]:
+
+def get_board_chance(key: str, word: str, frequency: FrequencyDict, max_length: int = 5) -> float:
+    return 1 - (1 - get_chance(key, word, frequency)) ** (max_length * max_length)  # Improve
+
+
+# The subwords and score of each word, for the last few word indexes (most recently used last).
+# Each index is matched by identity rather than by its id, which could be reused once it has been freed.
+_subword_scores: List[Tuple[WordIndex, int, Dict[str, Tuple[Tuple[str, ...], int]]]] = []
+SUBWORD_CACHE_SIZE = 200000
+
+
+def _get_subword_scores(words: WordIndex, max_length: int) -> Dict[str, Tuple[Tuple[str, ...], int]]:
+    for number, (cached_words, cached_length, scores) in enumerate(_subword_scores):
+        if cached_words is words and cached_length == max_length:
+            _subword_scores.append(_subword_scores.pop(number))
+            return scores
+    scores = {}
+    _subword_scores.append((words, max_length, scores))
+    if len(_subword_scores) > 4:
+        _subword_scores.pop(0)
+    return scores
+
+
+def get_subword_score(words: WordIndex, word: str, max_length: int = 5) -> Tuple[Tuple[str, ...], int]:
+    """
+    The words within `word`, and the sum of their scores. These only depend on the word, so they are remembered.
+    >>> from make5.utilities import _get_test_words
+    >>> get_subword_score(_get_test_words(), '.logs')
+    (('log', 'logs'), 7)
+    """
+    scores = _get_subword_scores(words, max_length)
+    if word not in scores:
+        if len(scores) >= SUBWORD_CACHE_SIZE:
+            scores.clear()
+        subwords = tuple(r[1] for r in get_subwords(words, word))
+        scores[word] = (subwords, sum(get_score(w, max_length) for w in subwords))
+    return scores[word]
+
+
+class ScoredChoices:
+    """
+    The scores of all the choices for a key, worked out together, without making a `Choice` for each.
+    Only the choices which are asked for become `Choice` objects.
+    """
+    def __init__(self, key: str, candidates: Sequence[str], words: WordIndex, frequency: FrequencyDict, max_length: int = 5) -> None:
+        self.key = key
+        self.candidates = candidates
+        self.max_length = max_length
+        wildcards = [position for position, letter in enumerate(key) if letter == SYMBOL]
+        exponent = max_length * max_length
+        self.subword_scores = [get_subword_score(words, word, max_length) for word in candidates]
+        self.chances = []
+        for word in candidates:
+            chance = 1.0
+            for position in wildcards:
+                chance *= frequency.get(word[position], 1)
+            self.chances.append(1 - (1 - chance) ** exponent)
+        self.adjusted_scores = [chance * score for chance, (_, score) in zip(self.chances, self.subword_scores)]
+        self.total_adjusted_score = sum(self.adjusted_scores)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def get_choice(self, number: int) -> Choice:
+        subwords, score = self.subword_scores[number]
+        return Choice.from_scores(self.candidates[number], self.key, subwords, score, self.chances[number], self.max_length)
+
+    def get_sorted(self) -> List[Choice]:
+        """
+        All the choices, from the lowest adjusted score to the highest (keeping the order of equal ones).
+        """
+        numbers = sorted(range(len(self)), key=self.adjusted_scores.__getitem__)
+        return [self.get_choice(number) for number in numbers]
+
+    def get_top(self, count: int) -> List[Choice]:
+        """
+        The same choices as `self.get_sorted()[-count:][::-1]`, highest first.
+        """
+        numbers = heapq.nlargest(count, range(len(self)), key=lambda number: (self.adjusted_scores[number], number))
+        return [self.get_choice(number) for number in numbers]
+
+
+def get_candidates(key: str, required_index: Union[int, None], words: WordIndex) -> List[str]:
     length = len(key)
     subwords = tuple(get_subwords(words, key))
     full_length_results = list(get_full_length_combos(subwords, length))
@@ -35,10 +131,54 @@ def get_sorted_choices(key: str, required_index: Union[int, None], words: WordDi
         if len(word) != length]
     if required_index is not None:
         partial_results = [word for word in partial_results if word[required_index] != SYMBOL]
-    results = partial_results + full_length_results
-    choices = [Choice(word, key, 0, words, frequency) for word in results]
-    sorted_choices = sorted(choices, key=lambda s: s.adjusted_score)
-    return sorted_choices
+    return partial_results + full_length_results
+
+
+@instrument
+def score_choices(key: str, required_index: Union[int, None], words: WordIndex, frequency: FrequencyDict) -> ScoredChoices:
+    """
+    >>> from make5.utilities import _get_test_words, read_frequencies
+    >>> import os
+    >>> frequency = read_frequencies(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_tiles.txt'))
+    >>> words = _get_test_words()
+    >>> scored = score_choices('?log?', 1, words, frequency)
+    >>> candidates = get_candidates('?log?', 1, words)
+    >>> old = sorted((Choice(word, '?log?', 0, words, frequency) for word in candidates), key=lambda s: s.adjusted_score)
+    >>> [choice.word for choice in scored.get_top(3)] == [choice.word for choice in old[-3:][::-1]]
+    True
+    >>> round(scored.total_adjusted_score, 6) == round(sum(choice.adjusted_score for choice in old), 6)
+    True
+    """
+    return ScoredChoices(key, get_candidates(key, required_index, words), words, frequency)
+
+
+@instrument
+def get_sorted_choices(key: str, required_index: Union[int, None], words: WordIndex, frequency: FrequencyDict,
+                       cache: Optional[TieredCache] = None) -> Sequence[Choice]:
+    """
+    With a cache (which should only be used with one word list and set of frequencies), the choices for each key
+    are only worked out once, and are the same as without it.
+    >>> from make5.utilities import _get_test_words, read_frequencies
+    >>> from word_games.cache import LRUCache
+    >>> import os
+    >>> frequency = read_frequencies(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_tiles.txt'))
+    >>> words, cache = _get_test_words(), TieredCache(LRUCache(100))
+    >>> for key in ('.log?', '?log?', '.LOG?', '.log?'):
+    ...     cached = get_sorted_choices(key, 1, words, frequency, cache)
+    ...     uncached = get_sorted_choices(key, 1, words, frequency)
+    ...     print(key, len(cached), [c.word for c in cached] == [c.word for c in uncached])
+    .log? 3 True
+    ?log? 12 True
+    .LOG? 0 True
+    .log? 3 True
+    >>> cache.stats.hits, cache.stats.misses
+    (1, 3)
+    """
+    if cache is None:
+        return score_choices(key, required_index, words, frequency).get_sorted()
+    # A copy, so that the cached list cannot be changed.
+    return list(cache.get_or_put(('get_sorted_choices', key, required_index),
+                                 lambda: score_choices(key, required_index, words, frequency).get_sorted()))
 
 
 def print_choices(sorted_choices: Sequence[Choice]) -> None:
@@ -1,18 +1,11 @@
-import itertools
-from make5.utilities import SYMBOL
-from typing import Optional, Iterator
+from make5.pattern_index import PatternIndex, build_pattern_index, get_words_with_letters_missing
+from typing import List, Optional
 from make5.types import WordDict
+from word_games.index_file import load_index
+from word_games.instrument import instrument
 
-
-def get_words_with_letters_missing(word: str) -> Iterator[str]:
-    """
-    >>> list(get_words_with_letters_missing('dog'))
-    ['dog', '?og', 'd?g', 'do?', '??g', '?o?', 'd??', '???']
-    """
-    for r in range(0, len(word) + 1): # ie. [0, 1, 2, 3, ..., len(word)]
-        for replacement_indexes in itertools.combinations(range(len(word)), r):
-            result = ''.join(SYMBOL if i in replacement_indexes else word[i] for i in range(len(word)))
-            yield result
+INDEX_KIND = 'make5'
+INDEX_VERSION = 2
 
 
 def add_to_words_dict(words: WordDict, word: str) -> WordDict:
@@ -26,16 +19,40 @@ def add_to_words_dict(words: WordDict, word: str) -> WordDict:
     """
     for key in get_words_with_letters_missing(word):
         if key in words:
-            words[key] += [word]
+            words[key].append(word)
         else:
             words[key] = [word]
     return words
 
+def read_word_list(path: str) -> List[str]:
+    with open(path, 'r') as f:
+        return [word for word in (line.strip() for line in f) if len(word) <= 5]
+
 def read_words(path: str, words: Optional[WordDict] = None) -> WordDict:
+    """
+    Reads the words into a dict with a list for every pattern, which `read_pattern_index` does more compactly.
+    """
     updated_words = {} if words is None else words
-    with open(path, 'r') as f:
-        for word_with_return in f:
-            word = word_with_return.strip()
-            if len(word) <= 5:
-                updated_words = add_to_words_dict(updated_words, word)
+    for word in read_word_list(path):
+        updated_words = add_to_words_dict(updated_words, word)
     return updated_words
+
+@instrument
+def read_pattern_index(path: str) -> PatternIndex:
+    """
+    Reads the words into a `PatternIndex`, which gives the same words as `read_words`.
+    >>> import os
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_data.txt')
+    >>> words, words_dict = read_pattern_index(path), read_words(path)
+    >>> all(list(words[pattern]) == words_dict[pattern] for pattern in words_dict), len(words) == len(words_dict)
+    (True, True)
+    """
+    return build_pattern_index(read_word_list(path))
+
+@instrument
+def load_words(path: str, index_path: Optional[str] = None, rebuild: bool = False) -> PatternIndex:
+    """
+    Memory-maps the prebuilt index of the words in `path`, building and saving it first if needed.
+    """
+    index = load_index(path, INDEX_KIND, INDEX_VERSION, lambda: read_pattern_index(path).get_sections(), index_path, rebuild)
+    return PatternIndex.from_index(index)
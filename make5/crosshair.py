@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from make5.types import FrequencyDict, WordDict
-from typing import Dict, List, Optional, Sequence
-from make5.choice import get_sorted_choices
+from make5.types import FrequencyDict, WordIndex
+from typing import List, Optional, Sequence
+from make5.choice import score_choices
 from make5.utilities import replace
+from word_games.instrument import instrument
 
 ALL_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
 
@@ -14,14 +15,30 @@ class Crosshair:
     row: Sequence[str]
     col: Sequence[str]
 
+    @classmethod
+    def from_line_scores(cls, letter: str, row_score: 'LineScore', col_score: 'LineScore') -> 'Crosshair':
+        return cls(letter, row_score.score + col_score.score, list(row_score.top_words), list(col_score.top_words))
 
+
+@dataclass(frozen=True)
+class LineScore:
+    score: float  # The total adjusted score of all the choices.
+    top_words: Sequence[str]  # The best few choices, best first.
+
+
+def score_line(key: str, required_index: int, words: WordIndex, frequency: FrequencyDict) -> LineScore:
+    choices = score_choices(key, required_index, words, frequency)
+    return LineScore(choices.total_adjusted_score, [choice.word for choice in choices.get_top(6)])
+
+
+@instrument
 def get_crosshairs(
     row_key: str,
     col_key: str,
     row_index: int,
     col_index: int,
     allowed_letters: Optional[Sequence[str]],
-    words: WordDict,
+    words: WordIndex,
     frequency: FrequencyDict
 ) -> List[Crosshair]:
     """
@@ -38,18 +55,7 @@ def get_crosshairs(
         allowed_letters = ALL_LETTERS
     result: List[Crosshair] = []
     for letter in allowed_letters:
-        this_row_key = replace(row_key, col_index, letter)
-        row_choices = get_sorted_choices(this_row_key, col_index, words, frequency)
-        row_score = sum(s.adjusted_score for s in row_choices)
-
-        this_col_key = replace(col_key, row_index, letter)
-        col_choices = get_sorted_choices(this_col_key, row_index, words, frequency)
-        col_score = sum(s.adjusted_score for s in col_choices)
-
-        result.append(Crosshair(
-            letter,
-            row_score + col_score,
-            [x.word for x in row_choices[-6:][::-1]],
-            [x.word for x in col_choices[-6:][::-1]]
-        ))
+        row_score = score_line(replace(row_key, col_index, letter), col_index, words, frequency)
+        col_score = score_line(replace(col_key, row_index, letter), row_index, words, frequency)
+        result.append(Crosshair.from_line_scores(letter, row_score, col_score))
     return result
@@ -0,0 +1,175 @@
+"""
+Look more than one tile ahead: an expectimax search over where to place each tile,
+averaging over the next tile drawn, with the chance of each letter from `make5/tiles.txt`.
+
+Each grid at the end of the search is valued by the sum of the expected scores of its rows and columns,
+the same as `make5.calculate` uses (`ScoredChoices.total_adjusted_score`), so that full and open lines are
+valued alike.
+Grids reached in more than one way are only searched once, and the places for each tile are tried
+in order of their value one tile ahead, so that `breadth` can keep to the most promising ones.
+
+With a `time_limit`, the search goes one tile deeper at a time, and gives the best place found by the deepest
+search which finished in time, eg.
+
+    result = find_best_move(grid, 'e', words, frequency, depth=3, time_limit=2.0)
+    print(result.move, result.depth)
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from make5.choice import score_choices
+from make5.types import FrequencyDict, WordIndex
+from make5.utilities import SYMBOL, replace
+
+Grid = Tuple[str, ...]
+Cell = Tuple[int, int]
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class LookaheadResult:
+    move: Optional[Cell]  # None if the grid is already full.
+    value: float
+    depth: int  # The number of tiles looked ahead by the deepest search which finished.
+    # The value of placing the tile in each cell which was searched, by that search.
+    values: Dict[Cell, float] = field(repr=False)
+    nodes: int  # The number of grids searched, over every depth.
+    seconds: float
+
+
+def get_empty_cells(grid: Sequence[str]) -> List[Cell]:
+    return [(row_index, col_index) for row_index, row in enumerate(grid)
+            for col_index, letter in enumerate(row) if letter == SYMBOL]
+
+
+def place(grid: Grid, cell: Cell, letter: str) -> Grid:
+    row_index, col_index = cell
+    return grid[:row_index] + (replace(grid[row_index], col_index, letter),) + grid[row_index + 1:]
+
+
+class Lookahead:
+    """
+    >>> from make5.utilities import _get_test_words, read_frequencies
+    >>> import os
+    >>> frequency = read_frequencies(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_tiles.txt'))
+    >>> lookahead = Lookahead(_get_test_words(), frequency)
+    >>> grid = ('d?g', '???', '???')
+    >>> lookahead.find_best_move(grid, 'o', depth=1).move
+    (1, 0)
+    >>> result = lookahead.find_best_move(grid, 'o', depth=2, breadth=3)
+    >>> result.move, result.depth, len(result.values)
+    ((2, 1), 2, 3)
+    >>> find_best_move(grid, 'o', lookahead.words, frequency, depth=3, breadth=3, time_limit=0).depth
+    1
+    >>> narrow = lookahead.find_best_move(grid, 's', depth=3, breadth=1)
+    >>> lookahead.find_best_move(grid, 's', 3, 2).move, find_best_move(grid, 's', lookahead.words, frequency, 3, 2).move
+    ((1, 2), (1, 2))
+    """
+    def __init__(self, words: WordIndex, frequency: FrequencyDict) -> None:
+        self.words = words
+        self.frequency = frequency
+        self._line_values: Dict[str, float] = {}
+        # The value of each grid searched so far, by (grid, letter or '', depth, breadth).
+        self._transpositions: Dict[Tuple[Grid, str, int, Optional[int]], float] = {}
+        self.nodes = 0
+        self._deadline: Optional[float] = None
+
+    def get_line_value(self, line: str) -> float:
+        value = self._line_values.get(line)
+        if value is None:
+            value = score_choices(line, None, self.words, self.frequency).total_adjusted_score
+            self._line_values[line] = value
+        return value
+
+    def get_value(self, grid: Grid) -> float:
+        columns = [''.join(row[col_index] for row in grid) for col_index in range(len(grid[0]))]
+        return sum(self.get_line_value(line) for line in [*grid, *columns])
+
+    def get_ordered_moves(self, grid: Grid, letter: str) -> List[Tuple[Cell, Grid]]:
+        """
+        The places for the letter, best first by the value of the grid one tile ahead.
+        """
+        moves = [(cell, place(grid, cell, letter)) for cell in get_empty_cells(grid)]
+        values = {cell: self.get_value(next_grid) for cell, next_grid in moves}
+        return sorted(moves, key=lambda move: -values[move[0]])
+
+    def get_move_value(self, grid: Grid, depth: int, breadth: Optional[int]) -> float:
+        """
+        The value of a grid just after a tile is placed, looking `depth` more tiles ahead.
+        """
+        if depth == 0 or SYMBOL not in ''.join(grid):
+            return self.get_value(grid)
+        transposition = (grid, '', depth, breadth)
+        if transposition not in self._transpositions:
+            self._transpositions[transposition] = sum(
+                chance * self.get_letter_value(grid, letter, depth, breadth)
+                for letter, chance in sorted(self.frequency.items())
+            )
+        return self._transpositions[transposition]
+
+    def get_letter_value(self, grid: Grid, letter: str, depth: int, breadth: Optional[int]) -> float:
+        """
+        The value of a grid when the letter is drawn, placing it in the best place.
+        """
+        transposition = (grid, letter, depth, breadth)
+        if transposition not in self._transpositions:
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+            self.nodes += 1
+            self._transpositions[transposition] = max(
+                self.get_move_value(next_grid, depth - 1, breadth)
+                for _, next_grid in self.get_ordered_moves(grid, letter)[:breadth]
+            )
+        return self._transpositions[transposition]
+
+    def search(self, grid: Grid, letter: str, depth: int, breadth: Optional[int],
+               cells: Optional[Sequence[Cell]] = None) -> Dict[Cell, float]:
+        """
+        The value of placing the letter in each of the cells (by default, the most promising `breadth` of them).
+        """
+        if cells is None:
+            cells = [cell for cell, _ in self.get_ordered_moves(grid, letter)[:breadth]]
+        self.nodes += 1
+        return {cell: self.get_move_value(place(grid, cell, letter), depth - 1, breadth) for cell in cells}
+
+    def find_best_move(self, grid: Sequence[str], letter: str, depth: int = 2, breadth: Optional[int] = None,
+                       time_limit: Optional[float] = None) -> LookaheadResult:
+        """
+        Searches one tile ahead, then two, and so on up to `depth`, unless the time limit runs out first.
+        Each search tries the cells in order of the values from the one before. The search one tile ahead
+        always finishes, so that there is always a move.
+        """
+        start_time = time.perf_counter()
+        grid = tuple(grid)
+        nodes = self.nodes
+        values: Dict[Cell, float] = {}
+        finished_depth = 0
+        try:
+            for this_depth in range(1, depth + 1):
+                cells = sorted(values, key=lambda cell: -values[cell]) if values else None
+                if this_depth > 1 and time_limit is not None:
+                    self._deadline = start_time + time_limit
+                values = self.search(grid, letter, this_depth, breadth, cells)
+                finished_depth = this_depth
+        except SearchTimeout:
+            pass
+        finally:
+            self._deadline = None
+        move = max(values, key=lambda cell: values[cell], default=None)
+        return LookaheadResult(
+            move,
+            values[move] if move is not None else self.get_value(grid),
+            finished_depth,
+            values,
+            self.nodes - nodes,
+            time.perf_counter() - start_time,
+        )
+
+
+def find_best_move(grid: Sequence[str], letter: str, words: WordIndex, frequency: FrequencyDict, depth: int = 2,
+                   breadth: Optional[int] = None, time_limit: Optional[float] = None) -> LookaheadResult:
+    return Lookahead(words, frequency).find_best_move(grid, letter, depth, breadth, time_limit)
@@ -0,0 +1,166 @@
+"""
+A compact index of the words matching each pattern of letters and SYMBOLs (eg. 'd?g').
+
+Rather than a list for every one of the 2^n patterns of every word, as `make5.compile_words.add_to_words_dict`
+builds, each word is numbered in the order of the word list, and there is one sorted array of word numbers
+for each (length, position, letter). A pattern's words are the intersection of those for its letters,
+found by AND-ing them as bitsets, so they come out in the order of the word list, just as in the dict.
+"""
+import itertools
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from make5.utilities import SYMBOL
+from word_games.index_file import IndexFile, MappedStrings, pack_strings
+
+CACHE_SIZE = 4096
+
+
+def get_words_with_letters_missing(word: str) -> Iterator[str]:
+    """
+    >>> list(get_words_with_letters_missing('dog'))
+    ['dog', '?og', 'd?g', 'do?', '??g', '?o?', 'd??', '???']
+    """
+    for r in range(0, len(word) + 1): # ie. [0, 1, 2, 3, ..., len(word)]
+        for replacement_indexes in itertools.combinations(range(len(word)), r):
+            result = ''.join(SYMBOL if i in replacement_indexes else word[i] for i in range(len(word)))
+            yield result
+
+
+def get_length_key(length: int) -> str:
+    return f'{length}'
+
+
+def get_letter_key(length: int, position: int, letter: str) -> str:
+    return f'{length}:{position}:{letter}'
+
+
+def get_word_ids(bits: int) -> Iterator[int]:
+    """
+    >>> list(get_word_ids(0b101001))
+    [0, 3, 5]
+    """
+    binary = bin(bits)[:1:-1]  # The lowest bit first.
+    word_id = binary.find('1')
+    while word_id >= 0:
+        yield word_id
+        word_id = binary.find('1', word_id + 1)
+
+
+class PatternIndex(Mapping[str, Tuple[str, ...]]):
+    """
+    A read-only mapping from each pattern to the words matching it, in the order of the word list.
+    >>> words = build_pattern_index(['dog', 'log', 'do', 'fig', 'dog'])
+    >>> words['?og'], words.get('d?g'), words.get('do'), words.get('d?t', ()), words['???']
+    (('dog', 'log', 'dog'), ('dog', 'dog'), ('do',), (), ('dog', 'log', 'fig', 'dog'))
+    >>> 'l??' in words, 'l?t' in words, len(words)
+    (True, False, 22)
+    """
+    def __init__(self, words: Sequence[str], keys: Sequence[str], posting_offsets: Sequence[int],
+                 postings: Sequence[int], cache_size: int = CACHE_SIZE) -> None:
+        self.words = words
+        self._posting_offsets = posting_offsets
+        self._postings = postings
+        self._key_numbers = {key: key_number for key_number, key in enumerate(keys)}
+        self._bitsets: Dict[int, int] = {}
+        self._len: Optional[int] = None
+        # Each index keeps its own cache, so that it can be dropped along with the index.
+        self._find = lru_cache(maxsize=cache_size)(self._find_uncached)
+
+    def _get_postings(self, key: str) -> Sequence[int]:
+        key_number = self._key_numbers.get(key, -1)
+        if key_number < 0:
+            return ()
+        return self._postings[self._posting_offsets[key_number]:self._posting_offsets[key_number + 1]]
+
+    def _get_bitset(self, key: str) -> int:
+        key_number = self._key_numbers.get(key, -1)
+        if key_number < 0:
+            return 0
+        if key_number not in self._bitsets:
+            bits = bytearray((len(self.words) + 8) // 8)
+            for word_id in self._get_postings(key):
+                bits[word_id >> 3] |= 1 << (word_id & 7)
+            self._bitsets[key_number] = int.from_bytes(bits, 'little')
+        return self._bitsets[key_number]
+
+    def _find_uncached(self, pattern: str) -> Tuple[str, ...]:
+        letter_keys = [
+            get_letter_key(len(pattern), position, letter)
+            for position, letter in enumerate(pattern) if letter != SYMBOL
+        ]
+        if len(letter_keys) <= 1:
+            # No need for bitsets: the answer is already one of the arrays.
+            word_ids: Sequence[int] = self._get_postings(letter_keys[0] if letter_keys else get_length_key(len(pattern)))
+            return tuple(self.words[word_id] for word_id in word_ids)
+        bits = self._get_bitset(letter_keys[0])
+        for key in letter_keys[1:]:
+            if not bits:
+                break
+            bits &= self._get_bitset(key)
+        return tuple(self.words[word_id] for word_id in get_word_ids(bits))
+
+    def __getitem__(self, pattern: str) -> Tuple[str, ...]:
+        found = self._find(pattern) if isinstance(pattern, str) else ()
+        if not found:
+            raise KeyError(pattern)
+        return found
+
+    def get(self, pattern: str, default: Any = None) -> Any:
+        return self._find(pattern) or default
+
+    def __contains__(self, pattern: object) -> bool:
+        return isinstance(pattern, str) and bool(self._find(pattern))
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Every pattern with at least one word. There are a great many, and they are worked out as they go.
+        """
+        seen = set()
+        for word in self.words:
+            for pattern in get_words_with_letters_missing(word):
+                if pattern not in seen:
+                    seen.add(pattern)
+                    yield pattern
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self)
+        return self._len
+
+    def all_words(self) -> Sequence[str]:
+        return self.words
+
+    def get_cache_info(self) -> Any:
+        return self._find.cache_info()
+
+    def get_sections(self) -> List[bytes]:
+        keys = sorted(self._key_numbers)
+        posting_offsets = array('I', [0])
+        postings = array('I')
+        for key in keys:
+            postings.extend(self._get_postings(key))
+            posting_offsets.append(len(postings))
+        return [*pack_strings(self.words), *pack_strings(keys), posting_offsets.tobytes(), postings.tobytes()]
+
+    @classmethod
+    def from_index(cls, index: IndexFile) -> 'PatternIndex':
+        words = MappedStrings(index.uint32s(0), index.section(1))
+        keys = MappedStrings(index.uint32s(2), index.section(3))
+        return cls(words, keys, index.uint32s(4), index.uint32s(5))
+
+
+def build_pattern_index(words: Sequence[str]) -> PatternIndex:
+    postings: Dict[str, array] = {}
+    for word_id, word in enumerate(words):
+        postings.setdefault(get_length_key(len(word)), array('I')).append(word_id)
+        for position, letter in enumerate(word):
+            postings.setdefault(get_letter_key(len(word), position, letter), array('I')).append(word_id)
+    keys = list(postings)
+    posting_offsets = array('I', [0])
+    all_postings = array('I')
+    for key in keys:
+        all_postings.extend(postings[key])
+        posting_offsets.append(len(all_postings))
+    return PatternIndex(list(words), keys, posting_offsets, all_postings)
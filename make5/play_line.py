@@ -1,12 +1,16 @@
 from make5.choice import get_sorted_choices, print_choices
 from make5.utilities import SYMBOL, read_frequencies
-from make5.compile_words import read_words
+from make5.compile_words import load_words
+from word_games.cache import LRUCache, TieredCache
 
 
 if __name__ == '__main__':
-    words = read_words('./data/words.txt')
+    words = load_words('./data/words.txt')
     frequency = read_frequencies('./make5/tiles.txt')
 
+    # From turn to turn, most of the lines to score have been scored before.
+    cache = TieredCache(LRUCache(1000))
+
     while True:
         print()
         key = input('Enter an expression, eg. ".re..": ')
@@ -22,6 +26,6 @@ if __name__ == '__main__':
                 if key[position] == SYMBOL:
                     this_key = ''.join(letter if i == position else key[i] for i in range(len(key)))
                     print(this_key)
-                    print_choices(get_sorted_choices(this_key, position, words, frequency))
+                    print_choices(get_sorted_choices(this_key, position, words, frequency, cache))
         else:
-            print_choices(get_sorted_choices(key, None, words, frequency))
+            print_choices(get_sorted_choices(key, None, words, frequency, cache))
@@ -1,5 +1,33 @@
+from typing import Sequence
+from make5.types import WordIndex
+from make5.utilities import SYMBOL, get_subsets
+
 MAX_LENGTH_BONUS = 5
 
 
 def get_score(word: str, max_length: int = 5) -> int:
     return len(word) + (MAX_LENGTH_BONUS if len(word) == max_length else 0)
+
+
+def get_line_score(words: WordIndex, line: str, max_length: int = 5) -> int:
+    """
+    The score of the words in a row or column, as it stands (only counting the words with every letter placed).
+    >>> from make5.utilities import _get_test_words
+    >>> get_line_score(_get_test_words(), 'blogs'), get_line_score(_get_test_words(), 'blog?')
+    (21, 7)
+    """
+    return sum(
+        get_score(subkey, max_length)
+        for _, subkey in get_subsets(line) if SYMBOL not in subkey and subkey in words
+    )
+
+
+def get_grid_score(words: WordIndex, grid: Sequence[str], max_length: int = 5) -> int:
+    """
+    The score of the words in all the rows and columns of a grid, as it stands.
+    >>> from make5.utilities import _get_test_words
+    >>> get_grid_score(_get_test_words(), ['blogs', '?????', '?????', '?????', '?????'])
+    21
+    """
+    columns = [''.join(row[col_index] for row in grid) for col_index in range(len(grid[0]) if grid else 0)]
+    return sum(get_line_score(words, line, max_length) for line in [*grid, *columns])
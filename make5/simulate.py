@@ -0,0 +1,196 @@
+"""
+Play whole games of Make five, to see how well (and how fast) each strategy does.
+
+Each game starts with an empty grid, and draws its tiles from the frequencies in `make5/tiles.txt`,
+with its own seed, so the same seeds give the same tiles to every strategy. A finished grid is scored
+with `make5.score.get_grid_score`. Run eg.:
+
+    python -m make5.simulate --strategy random calculate --games 1000 --size 5
+"""
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from make5.calculate import DEFAULT_PATH, GridAnalyzer
+from make5.compile_words import load_words
+from make5.lookahead import Lookahead, get_empty_cells
+from make5.score import get_grid_score
+from make5.types import FrequencyDict, WordIndex
+from make5.utilities import SYMBOL, read_frequencies, replace
+
+Cell = Tuple[int, int]
+# Chooses where to place the letter on the grid. A new one is made for each game, so it can keep state between moves.
+Strategy = Callable[[List[str], str, random.Random], Cell]
+StrategyFactory = Callable[..., Strategy]
+
+
+def get_random_strategy(words: WordIndex, frequency: FrequencyDict) -> Strategy:
+    return lambda grid, letter, rng: rng.choice(get_empty_cells(grid))
+
+
+def get_calculate_strategy(words: WordIndex, frequency: FrequencyDict) -> Strategy:
+    """
+    Places each tile where `make5.calculate` shows it is best, looking one tile ahead.
+    """
+    analyzer = GridAnalyzer([], words, frequency)
+
+    def choose(grid: List[str], letter: str, rng: random.Random) -> Cell:
+        analyzer.set_grid(grid)
+        record = analyzer.calculate(letter)
+        return max(record, key=lambda cell: record[cell]['best_increase'])
+
+    return choose
+
+
+def get_lookahead_strategy(words: WordIndex, frequency: FrequencyDict, depth: int = 2, breadth: Optional[int] = 5,
+                           time_limit: Optional[float] = None) -> Strategy:
+    lookahead = Lookahead(words, frequency)
+
+    def choose(grid: List[str], letter: str, rng: random.Random) -> Cell:
+        move = lookahead.find_best_move(grid, letter, depth, breadth, time_limit).move
+        assert move is not None
+        return move
+
+    return choose
+
+
+STRATEGIES: Dict[str, StrategyFactory] = {
+    'random': get_random_strategy,
+    'calculate': get_calculate_strategy,
+    'lookahead': get_lookahead_strategy,
+}
+
+
+@dataclass(frozen=True)
+class GameResult:
+    strategy: str
+    seed: int
+    grid: Tuple[str, ...]
+    score: int
+    moves: int
+    seconds: float = field(compare=False)  # The time spent choosing moves.
+
+
+def draw_tile(frequency: FrequencyDict, rng: random.Random) -> str:
+    letters = sorted(frequency)
+    return rng.choices(letters, [frequency[letter] for letter in letters])[0]
+
+
+def play_game(strategy: Strategy, words: WordIndex, frequency: FrequencyDict, size: int = 5, seed: int = 0,
+              name: str = '') -> GameResult:
+    """
+    >>> from make5.utilities import _get_test_words
+    >>> words = _get_test_words()
+    >>> frequency = {'d': 0.25, 'o': 0.5, 'g': 0.25}
+    >>> result = play_game(get_calculate_strategy(words, frequency), words, frequency, size=3, seed=1)
+    >>> result.grid, result.score, result.moves
+    (('dog', 'odo', 'ggo'), 6, 9)
+    >>> play_game(get_random_strategy(words, frequency), words, frequency, size=3, seed=1).grid
+    ('ddo', 'goo', 'oog')
+    """
+    rng = random.Random(seed)
+    grid = [SYMBOL * size] * size
+    moves = 0
+    seconds = 0.0
+    while True:
+        empty_cells = get_empty_cells(grid)
+        if not empty_cells:
+            break
+        letter = draw_tile(frequency, rng)
+        start_time = time.perf_counter()
+        row_index, col_index = strategy(grid, letter, rng) if len(empty_cells) > 1 else empty_cells[0]
+        seconds += time.perf_counter() - start_time
+        if grid[row_index][col_index] != SYMBOL:
+            raise ValueError(f'The {name or "strategy"} strategy chose a full cell, {(row_index, col_index)}')
+        grid = grid[:row_index] + [replace(grid[row_index], col_index, letter)] + grid[row_index + 1:]
+        moves += 1
+    return GameResult(name, seed, tuple(grid), get_grid_score(words, grid), moves, seconds)
+
+
+_worker_words: Optional[WordIndex] = None
+_worker_frequency: FrequencyDict = {}
+
+
+def _load_worker_words(path: str, frequency: FrequencyDict) -> None:
+    global _worker_words, _worker_frequency
+    _worker_words = load_words(path)
+    _worker_frequency = frequency
+
+
+def _play_games(name: str, options: Mapping[str, Any], size: int, seeds: Sequence[int]) -> List[GameResult]:
+    assert _worker_words is not None
+    words, frequency = _worker_words, _worker_frequency
+    return [play_game(STRATEGIES[name](words, frequency, **options), words, frequency, size, seed, name)
+            for seed in seeds]
+
+
+def play_games(
+    name: str,
+    seeds: Sequence[int],
+    frequency: FrequencyDict,
+    size: int = 5,
+    path: str = DEFAULT_PATH,
+    workers: Optional[int] = None,
+    chunk_size: int = 4,
+    **options: Any,
+) -> List[GameResult]:
+    """
+    Plays a game for each seed with the named strategy (given any `options`), across worker processes,
+    returning the results in the order of the seeds. The results only depend on the seeds, not on the number of workers.
+    >>> import os
+    >>> dir_path = os.path.dirname(os.path.realpath(__file__))
+    >>> frequency = read_frequencies(os.path.join(dir_path, 'test_tiles.txt'))
+    >>> path = os.path.join(dir_path, 'test_data.txt')
+    >>> results = play_games('calculate', range(4), frequency, size=3, path=path, workers=2, chunk_size=1)
+    >>> [result.seed for result in results], results == play_games('calculate', range(4), frequency, 3, path, workers=1)
+    ([0, 1, 2, 3], True)
+    """
+    _load_worker_words(path, frequency)  # Build the index once, before the workers start.
+    chunks = [seeds[start:start + chunk_size] for start in range(0, len(seeds), chunk_size)]
+    if workers == 1:
+        return [result for chunk in chunks for result in _play_games(name, options, size, chunk)]
+    with ProcessPoolExecutor(workers, initializer=_load_worker_words, initargs=(path, frequency)) as executor:
+        futures = [executor.submit(_play_games, name, options, size, chunk) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+
+def get_summary(results: Sequence[GameResult]) -> str:
+    """
+    >>> results = [GameResult('random', seed, (), score, 25, 0.1) for seed, score in enumerate([10, 20, 30, 40, 50])]
+    >>> print(get_summary(results))
+    random: 5 games, score 30.0 ± 15.8 (min 10, quartiles 15.0 / 30.0 / 45.0, max 50), 250 moves per second
+    """
+    scores = [result.score for result in results]
+    quartiles = statistics.quantiles(scores, n=4) if len(scores) > 1 else [float(scores[0])] * 3
+    moves = sum(result.moves for result in results)
+    seconds = sum(result.seconds for result in results)
+    return (f'{results[0].strategy}: {len(results):,} games, '
+            f'score {statistics.mean(scores):.1f} ± {statistics.stdev(scores) if len(scores) > 1 else 0:.1f} '
+            f'(min {min(scores)}, quartiles {" / ".join(f"{q:.1f}" for q in quartiles)}, max {max(scores)}), '
+            f'{moves / max(seconds, 1e-9):,.0f} moves per second')
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Play whole games of Make five with each strategy, and compare their scores.')
+    parser.add_argument('--strategy', nargs='+', choices=sorted(STRATEGIES), default=['random', 'calculate'])
+    parser.add_argument('--games', type=int, default=100, help='The number of games for each strategy')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the first game; the others follow on')
+    parser.add_argument('--size', type=int, default=5, help='The number of rows and columns')
+    parser.add_argument('--depth', type=int, default=2, help='The number of tiles the lookahead strategy looks ahead')
+    parser.add_argument('--breadth', type=int, default=5, help='The number of places the lookahead strategy tries')
+    parser.add_argument('--workers', type=int, help='The number of worker processes')
+    parser.add_argument('--tiles', default='./make5/tiles.txt', help='The frequency of each tile')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    args = parser.parse_args()
+
+    frequency = read_frequencies(args.tiles)
+    seeds = range(args.seed, args.seed + args.games)
+    for name in args.strategy:
+        options = {'depth': args.depth, 'breadth': args.breadth} if name == 'lookahead' else {}
+        results = play_games(name, seeds, frequency, args.size, args.words, args.workers, **options)
+        print(get_summary(results))
@@ -1,17 +1,24 @@
-from make5.calculate import calculate
+from argparse import ArgumentParser, Namespace
+from make5.calculate import DEFAULT_PATH, GridAnalyzer
+from make5.lookahead import Lookahead
+from make5.score import get_grid_score
 from make5.utilities import SYMBOL, read_frequencies
-from make5.compile_words import read_words
+from make5.compile_words import load_words
+from word_games.instrument import PROFILE_HELP, profiled
 
 
-if __name__ == '__main__':
-    words = read_words('./data/words.txt')
+def main(args: Namespace) -> None:
+    words = load_words(args.words)
     frequency = read_frequencies('./make5/tiles.txt')
+    # Kept from turn to turn, so that only the lines which have changed are scored again.
+    analyzer = GridAnalyzer([], words, frequency, args.workers, args.words)
 
     while True:
         print('\nEnter your grid with commas between rows, and . for empty (eg. .....,...n.,f..a.,t..nk,....s)')
         grid = input('? ').lower().replace('.', SYMBOL).replace(' ','').split(',')
         if len(''.join(grid)) < 2:
             print('Goodbye!')
+            analyzer.close()
             exit()
         if len(grid[-1]) == 0:
             grid = grid[:-1]  # In case there was a trailing ,
@@ -21,12 +28,14 @@ if __name__ == '__main__':
         print('\t\t  ' + ''.join(f'{j}' for j in range(max_length)))
         for i, row in enumerate(grid):
             print(f'\t\t{i} {row.upper()}')
+        print(f'\nScore so far: {get_grid_score(words, grid)}')
 
         print()
         letter = input('Enter the new letter: ').lower()
         print()
 
-        record = calculate(grid, letter, words, frequency)
+        analyzer.set_grid(grid)
+        record = analyzer.calculate(letter)
         sorted_increases = sorted(record.items(), key=lambda t: t[1]['best_increase'], reverse=True)
 
         print('Best locations (analysing depth 1):')
@@ -34,3 +43,23 @@ if __name__ == '__main__':
             print(f'{coord}: {record["best_increase"]:6.2f} {record["crosshair"].score: 7.2f}  {"  ".join(record["crosshair"].row)}  vs  {record["best_other_crosshair"].letter}  {"  ".join(record["best_other_crosshair"].row)}')
             print(f'                        {"  ".join(record["crosshair"].col)}  vs     {"  ".join(record["best_other_crosshair"].col)}')
 
+        if args.depth > 1:
+            result = Lookahead(words, frequency).find_best_move(grid, letter, args.depth, args.breadth, args.time_limit)
+            print(f'\nBest locations (analysing depth {result.depth}, {result.nodes:,} positions in {result.seconds:.1f}s):')
+            for coord in sorted(result.values, key=lambda cell: -result.values[cell]):
+                print(f'{coord}: {result.values[coord]:7.2f}')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Find the best places for each new letter in a game of Make five.')
+    parser.add_argument('--workers', type=int, default=1, help='The number of worker processes to score lines with')
+    parser.add_argument('--depth', type=int, default=1, help='The number of tiles to look ahead')
+    parser.add_argument('--breadth', type=int, default=5,
+                        help='The number of places to try for each tile when looking ahead')
+    parser.add_argument('--time-limit', type=float, help='The most seconds to spend looking ahead')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    parser.add_argument('--profile', metavar='FILE', help=PROFILE_HELP)
+    args = parser.parse_args()
+
+    with profiled(args.profile):
+        main(args)
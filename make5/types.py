@@ -1,4 +1,7 @@
-from typing import Dict, List
+from typing import Dict, List, Mapping, Sequence
 
 WordDict = Dict[str, List[str]]
 FrequencyDict = Dict[str, int]
+
+# Either a WordDict, or a read-only index such as `make5.pattern_index.PatternIndex`.
+WordIndex = Mapping[str, Sequence[str]]
@@ -1,9 +1,9 @@
 import os
-import hashlib
 from collections import defaultdict
-from functools import lru_cache
-from typing import Iterator, Optional, Sequence, Tuple
-from make5.types import FrequencyDict, WordDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from make5.types import FrequencyDict, WordIndex
+from word_games.cache import LRUCache, SqliteCache, TieredCache, get_default_cache_dir
+from word_games.instrument import instrument, register_cache
 
 SYMBOL = '?'
 CACHE_TO_FILE_LENGTH = 800
@@ -20,7 +20,7 @@ def replace(key: str, position: int, letter: str) -> str:
     return key[:position] + letter + key[position + 1:]
 
 
-def _get_test_words() -> WordDict:
+def _get_test_words() -> WordIndex:
     """
     >>> _get_test_words()['?og']
     ['dog', 'log']
@@ -40,7 +40,7 @@ def get_subsets(key: str, min_length: int = 3) -> Iterator[Tuple[int, str]]:
             yield start_index, key[start_index:start_index + length]
 
 
-def get_subwords(words: WordDict, key: str, min_length: int = 3) -> Iterator[Tuple[int, str]]:
+def get_subwords(words: WordIndex, key: str, min_length: int = 3) -> Iterator[Tuple[int, str]]:
     """
     >>> words = _get_test_words()
     >>> list(get_subwords(words, 'skits'))
@@ -69,32 +69,39 @@ def get_chance(key: str, word: str, frequency: FrequencyDict) -> float:
     return x
 
 
-def read_combos_from_file(subwords: Tuple[Tuple[int, str]], full_length: int, dir_name='make5/combos') -> Optional[Sequence[str]]:
-    m = hashlib.sha256()
-    m.update(f'subwords:{subwords}'.encode('utf-8'))
-    filename = f'{full_length}-{m.hexdigest()}.txt'
-    path = os.path.join(dir_name, filename)
-    os.makedirs(dir_name, exist_ok=True)
-    result = []
-    try:
-        with open(path, 'r') as f:
-            result = f.readlines()
-    except FileNotFoundError:
-        return None
+_combo_cache: Optional[TieredCache] = None
 
-    return tuple(word.replace('\n', '') for word in result)
+
+def get_combo_cache() -> TieredCache:
+    """
+    The cache of `get_full_length_combos`. The combos of many subwords are also kept on disk,
+    in `make5_combos.sqlite3` in `word_games.cache.get_default_cache_dir()`.
+    """
+    global _combo_cache
+    if _combo_cache is None:
+        path = os.path.join(get_default_cache_dir(), 'make5_combos.sqlite3')
+        _combo_cache = TieredCache(LRUCache(5000), SqliteCache(path))
+    return _combo_cache
+
+
+def set_combo_cache(cache: TieredCache) -> None:
+    """
+    Eg. `set_combo_cache(TieredCache(LRUCache(100)))` to keep nothing on disk.
+    """
+    global _combo_cache
+    _combo_cache = cache
+
+
+def _get_combo_cache_counts() -> Tuple[int, int]:
+    stats = _combo_cache.stats if _combo_cache is not None else None
+    return (stats.hits, stats.misses) if stats is not None else (0, 0)
 
 
-def write_combos_to_file(subwords: Tuple[Tuple[int, str]], full_length: int, combos: Sequence[str], dir_name='make5/combos') -> None:
-    m = hashlib.sha256()
-    m.update(f'subwords:{subwords}'.encode('utf-8'))
-    path = os.path.join(dir_name, f'{full_length}-{m.hexdigest()}.txt')
-    with open(path, 'w') as f:
-        f.writelines(tuple(f'{combo}\n' for combo in combos))
+register_cache('make5.utilities.combo_cache', _get_combo_cache_counts)
 
 
-@lru_cache(maxsize=5000)
-def get_full_length_combos(subwords: Tuple[Tuple[int, str]], full_length: int) -> Sequence[str]:
+@instrument
+def get_full_length_combos(subwords: Tuple[Tuple[int, str], ...], full_length: int) -> Sequence[str]:
     """
     This returns key-length combinations that make more than one word.
     Ie. it is missing the single words which do not fit with any others.
@@ -106,33 +113,56 @@ def get_full_length_combos(subwords: Tuple[Tuple[int, str]], full_length: int) -
     >>> get_full_length_combos(subwords, 5)
     ['blogs', 'clogs', 'doggy', 'logos', 'skits', 'slogs', 'adogs', 'blogo', 'clogo', 'slogo']
     """
-    if len(subwords) > CACHE_TO_FILE_LENGTH:
-        from_file = read_combos_from_file(subwords, full_length)
-        if from_file:
-            return from_file
-    d = defaultdict(list)
+    cache = get_combo_cache()
+    durable = len(subwords) > CACHE_TO_FILE_LENGTH
+    return cache.get_or_put((subwords, full_length), lambda: find_full_length_combos(subwords, full_length), durable)
+
+
+def get_tails(words_by_position: Dict[Tuple[int, int], List[str]], start_index: int, length_so_far: int,
+              full_length: int) -> Dict[str, List[str]]:
+    """
+    The ends of the words starting at `start_index` which can be added to a combo of `length_so_far` letters,
+    grouped by the letters they share with the combo, in the order they are tried.
+    """
+    overlap = max(length_so_far - start_index, 0)
+    tails: Dict[str, List[str]] = defaultdict(list)
+    for comparison_length in range(length_so_far - start_index + 1, full_length):
+        for word in words_by_position.get((start_index, comparison_length), []):
+            tails[word[:overlap]].append(word[length_so_far - 1:])
+    return tails
+
+
+def find_full_length_combos(subwords: Tuple[Tuple[int, str], ...], full_length: int) -> List[str]:
+    """
+    Builds up combos from the start of the key, adding each word which matches the letters they share.
+    The words are grouped by those letters up front, so each combo only meets the words which match it,
+    and new combos are checked against a set.
+    """
+    words_by_position: Dict[Tuple[int, int], List[str]] = defaultdict(list)
     for start_index, word in subwords:
-        d[(start_index, len(word))].append(word)
-    # d[(0, length)] are the solutions so far.
-    for min_length_so_far in range(2, full_length):
-        for w in d.get((0, min_length_so_far), []):
-            for start_index in range(1, full_length - 1):
-                for comparison_length in range(min_length_so_far - start_index + 1, full_length):
-                    for w2 in d.get((start_index, comparison_length), []):
-                        # print((0, min_length_so_far, w), (start_index, comparison_length, w2), list(range(start_index, min_length_so_far)))
-                        if all(w[i] == w2[i - start_index] for i in range(start_index, min_length_so_far)):
-                            # These two words match at all common positions.
-                            # If it's a new combination, add it to the dictionary d.
-                            new_combo = w + w2[min_length_so_far - 1:]
-                            new_key = (0, len(new_combo))
-                            if new_combo not in d[new_key]:
-                                # print(new_key, new_combo)
-                                d[new_key].append(new_combo)
-
-    result = d[(0, full_length)]
-    if len(subwords) > CACHE_TO_FILE_LENGTH:
-        write_combos_to_file(subwords, full_length, result)
-    return result
+        words_by_position[(start_index, len(word))].append(word)
+    # combos[length] are the solutions so far.
+    combos = {length: list(words_by_position.get((0, length), [])) for length in range(full_length + 1)}
+    seen = {length: set(found) for length, found in combos.items()}
+    for length_so_far in range(2, full_length):
+        all_tails = [
+            (start_index, get_tails(words_by_position, start_index, length_so_far, full_length))
+            for start_index in range(1, full_length - 1)
+        ]
+        combos_so_far = combos[length_so_far]
+        # New combos of this length are added to the end of the list, and are extended in turn too.
+        number = 0
+        while number < len(combos_so_far):
+            combo = combos_so_far[number]
+            number += 1
+            for start_index, tails in all_tails:
+                for tail in tails.get(combo[start_index:length_so_far], ()):
+                    new_combo = combo + tail
+                    # Shorter combos could never be extended any further.
+                    if len(new_combo) >= length_so_far and new_combo not in seen[len(new_combo)]:
+                        seen[len(new_combo)].add(new_combo)
+                        combos[len(new_combo)].append(new_combo)
+    return combos[full_length]
 
 
 def read_frequencies(path: str) -> FrequencyDict:
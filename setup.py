@@ -50,7 +50,8 @@ setup(
     author=AUTHOR,
     author_email=EMAIL,
     # url=URL,
-    packages=find_packages(exclude=('scripts', 'test_utilities')),
+    python_requires='>=3.8',  # For typing.Protocol.
+    packages=find_packages(exclude=('scripts', 'test_utilities', 'benchmarks')),
     # packages=find_packages(exclude=('tests',)),
     # If your package is a single module, use this instead of 'packages':
     # py_modules=['mypackage'],
@@ -68,7 +69,6 @@ setup(
         # Full list: https://pypi.python.org/pypi?%3Aaction=list_classifiers
         'License :: Other/Proprietary License',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: Implementation :: CPython'
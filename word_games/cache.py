@@ -0,0 +1,260 @@
+"""
+Caches of results which are slow to work out: a small in-memory LRU tier (whose entries can also expire)
+in front of an optional on-disk tier, shared between processes.
+
+The disk tier is one SQLite database, so writes are atomic, several processes can read and write it at once,
+and it stays under a size limit by dropping the least recently used entries. Its keys are the sha256 of
+`repr(key)`, and its values must be JSON-serialisable (they come back with lists for tuples).
+It lives in $WORD_GAMES_CACHE_DIR, or else in $XDG_CACHE_HOME/word_games (usually ~/.cache/word_games).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar, cast
+
+MISSING = object()
+
+T = TypeVar('T')
+
+
+def get_default_cache_dir() -> str:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('WORD_GAMES_CACHE_DIR') or os.path.join(cache_home, 'word_games')
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """
+    With `max_age`, entries are also forgotten that many seconds after they were put.
+    >>> cache = LRUCache(max_entries=2)
+    >>> cache.put('a', 1); cache.put('b', 2); cache.get('a'); cache.put('c', 3)
+    1
+    >>> cache.get('b', None), cache.get('a'), cache.get('c'), len(cache), cache.evictions
+    (None, 1, 3, 2, 1)
+    >>> now = [0.0]
+    >>> cache = LRUCache(max_entries=2, max_age=10, clock=lambda: now[0])
+    >>> cache.put('a', 1); now[0] = 9; cache.get('a', None)
+    1
+    >>> now[0] = 11; cache.get('a', None), len(cache), cache.expirations
+    (None, 0, 1)
+    """
+    def __init__(self, max_entries: int = 5000, max_age: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._expiry_times: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        value = self._entries.get(key, MISSING)
+        if value is MISSING:
+            return default
+        if self.max_age is not None and self.clock() >= self._expiry_times[key]:
+            del self._entries[key], self._expiry_times[key]
+            self.expirations += 1
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.max_age is not None:
+            self._expiry_times[key] = self.clock() + self.max_age
+        while len(self._entries) > self.max_entries:
+            oldest_key, _ = self._entries.popitem(last=False)
+            self._expiry_times.pop(oldest_key, None)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiry_times.clear()
+
+
+class SqliteCache:
+    """
+    The times entries are read are written in batches (and before anything is evicted), rather than on every read.
+    >>> import tempfile
+    >>> cache = SqliteCache(os.path.join(tempfile.mkdtemp(), 'test.sqlite3'), max_bytes=50)
+    >>> cache.put(('x', 5), ['blogs', 'clogs']); cache.get(('x', 5)), cache.get(('y', 5), None)
+    (['blogs', 'clogs'], None)
+    >>> cache.put(('y', 5), ['a' * 20]); cache.put(('z', 5), ['b' * 20])
+    >>> cache.get(('x', 5), None), cache.evictions, cache.get_size()
+    (None, 1, 48)
+    >>> now = [0.0]
+    >>> cache = SqliteCache(os.path.join(tempfile.mkdtemp(), 'test.sqlite3'), max_bytes=50, clock=lambda: now[0])
+    >>> cache.put('a', 'a' * 20); now[0] = 1; cache.put('b', 'b' * 20); now[0] = 2; cache.get('a')
+    'aaaaaaaaaaaaaaaaaaaa'
+    >>> now[0] = 3; cache.put('c', 'c' * 20); cache.get('a', None) is not None, cache.get('b', None)
+    (True, None)
+    """
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, clock: Callable[[], float] = time.time,
+                 max_pending_reads: int = 1000) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.max_pending_reads = max_pending_reads
+        self.evictions = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = -1
+        # The time each entry was last read, since they were last written.
+        self._pending_reads: Dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection cannot be shared with a forked worker process, so each process opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS entries '
+                    '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+                # The total size of the entries, kept up to date by every process which writes them.
+                connection.execute('CREATE TABLE IF NOT EXISTS total (size INTEGER NOT NULL)')
+                connection.execute('INSERT INTO total SELECT COALESCE(SUM(size), 0) FROM entries '
+                                   'WHERE NOT EXISTS (SELECT * FROM total)')
+            self._connection, self._pid = connection, os.getpid()
+            self._pending_reads = {}
+        return self._connection
+
+    @staticmethod
+    def get_key(key: Any) -> str:
+        return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def get_size(self) -> int:
+        return cast(int, self._connect().execute('SELECT size FROM total').fetchone()[0])
+
+    def get(self, key: Any, default: Any = MISSING) -> Any:
+        connection = self._connect()
+        hashed_key = self.get_key(key)
+        row = connection.execute('SELECT value FROM entries WHERE key = ?', (hashed_key,)).fetchone()
+        if row is None:
+            return default
+        self._pending_reads[hashed_key] = self.clock()
+        if len(self._pending_reads) >= self.max_pending_reads:
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                self._write_reads(connection)
+        return json.loads(row[0])
+
+    def _write_reads(self, connection: sqlite3.Connection) -> None:
+        connection.executemany('UPDATE entries SET used = ? WHERE key = ?',
+                               [(used, hashed_key) for hashed_key, used in self._pending_reads.items()])
+        self._pending_reads.clear()
+
+    def put(self, key: Any, value: Any) -> None:
+        connection = self._connect()
+        hashed_key = self.get_key(key)
+        text = json.dumps(value)
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._write_reads(connection)
+            row = connection.execute('SELECT size FROM entries WHERE key = ?', (hashed_key,)).fetchone()
+            connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                               (hashed_key, text, len(text), self.clock()))
+            connection.execute('UPDATE total SET size = size + ?', (len(text) - (row[0] if row else 0),))
+            total = connection.execute('SELECT size FROM total').fetchone()[0]
+            while total > self.max_bytes:
+                oldest_key, size = connection.execute('SELECT key, size FROM entries ORDER BY used, rowid LIMIT 1').fetchone()
+                connection.execute('DELETE FROM entries WHERE key = ?', (oldest_key,))
+                connection.execute('UPDATE total SET size = size - ?', (size,))
+                total -= size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        connection = self._connect()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM entries')
+            connection.execute('UPDATE total SET size = 0')
+        self._pending_reads.clear()
+
+
+class TieredCache:
+    """
+    Looks in memory, and then on disk (if there is a disk tier), keeping what it finds on disk in memory too.
+    Only entries put with `durable=True` are written to disk, and only those are looked for there.
+    >>> cache = TieredCache(LRUCache(10))
+    >>> cache.get('key', None)
+    >>> cache.put('key', ['value']); cache.get('key'), cache.stats.hit_rate
+    (['value'], 0.5)
+    """
+    def __init__(self, memory: LRUCache, disk: Optional[SqliteCache] = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: Any, default: Any = MISSING, durable: bool = False) -> Any:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.stats.memory_hits += 1
+            return value
+        if durable and self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except (sqlite3.Error, OSError):
+                self.disk = None  # Carry on with just the memory tier, eg. if the cache directory is read-only.
+            if value is not MISSING:
+                self.stats.disk_hits += 1
+                self.memory.put(key, value)
+                return value
+        self.stats.misses += 1
+        return default
+
+    def put(self, key: Any, value: Any, durable: bool = False) -> None:
+        self.memory.put(key, value)
+        if durable and self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except (sqlite3.Error, OSError):
+                self.disk = None
+        self.stats.evictions = self.memory.evictions + (self.disk.evictions if self.disk is not None else 0)
+        self.stats.expirations = self.memory.expirations
+
+    def get_or_put(self, key: Any, get_value: Callable[[], T], durable: bool = False) -> T:
+        """
+        The value kept for the key, or else the value from `get_value()`, which is then kept.
+        """
+        value = self.get(key, MISSING, durable)
+        if value is MISSING:
+            new_value = get_value()
+            self.put(key, new_value, durable)
+            return new_value
+        return cast(T, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        self.stats = CacheStats()
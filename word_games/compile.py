@@ -0,0 +1,27 @@
+"""
+Builds the prebuilt index files of all three games, so that the solvers can start in milliseconds.
+Run with:
+    python -m word_games.compile [path/to/words.txt]
+
+The solvers also build their index the first time they need it, or when the word list changes.
+"""
+import sys
+import time
+
+import boggle.compile_words
+import make5.compile_words
+import word_ladder.compile_words
+import word_ladder.graph
+from word_games.index_file import get_index_path
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else './data/words.txt'
+    for game in (boggle, make5, word_ladder):
+        start_time = time.perf_counter()
+        game.compile_words.load_words(path, rebuild=True)  # type: ignore
+        print(f'Wrote {get_index_path(path, game.compile_words.INDEX_KIND)} '  # type: ignore
+              f'in {time.perf_counter() - start_time:.2f}s')
+    start_time = time.perf_counter()
+    word_ladder.graph.load_graph(path, rebuild=True)
+    print(f'Wrote {get_index_path(path, word_ladder.graph.INDEX_KIND)} in {time.perf_counter() - start_time:.2f}s')
@@ -0,0 +1,306 @@
+"""
+Prebuilt word indexes, saved next to the word list so that solvers can memory-map them
+instead of rebuilding their index from `words.txt` every time they start.
+
+An index file holds a header, a table of sections, and the sections themselves:
+    magic, format version, kind, kind version, sha256 of the word list, number of sections,
+    (offset, length) of each section,
+    the sections, each starting on an 8-byte boundary.
+Each game decides what its sections hold. Integer arrays are stored in native byte order.
+
+An index whose version or word-list hash does not match is treated as missing, and rebuilt.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, overload
+
+MAGIC = b'WGIX'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sI16sI32sI')
+SECTION = struct.Struct('<QQ')
+ALIGNMENT = 8
+
+
+def hash_file(path: str) -> bytes:
+    m = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            m.update(block)
+    return m.digest()
+
+
+def get_index_path(words_path: str, kind: str) -> str:
+    """
+    >>> get_index_path('./data/words.txt', 'boggle')
+    './data/words.txt.boggle.idx'
+    """
+    return f'{words_path}.{kind}.idx'
+
+
+def _pad(length: int) -> int:
+    return -length % ALIGNMENT
+
+
+def encode_index(kind: str, kind_version: int, source_hash: bytes, sections: Sequence[bytes]) -> bytes:
+    if len(kind.encode('ascii')) > 16:
+        raise ValueError(f'The kind of an index can have at most 16 characters, not "{kind}"')
+    table_end = HEADER.size + SECTION.size * len(sections)
+    offset = table_end + _pad(table_end)
+    table = []
+    for section in sections:
+        table.append(SECTION.pack(offset, len(section)))
+        offset += len(section) + _pad(len(section))
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, kind.encode('ascii'), kind_version, source_hash, len(sections))]
+    parts += table
+    parts.append(b'\0' * _pad(table_end))
+    for section in sections:
+        parts += [section, b'\0' * _pad(len(section))]
+    return b''.join(parts)
+
+
+class IndexFile:
+    """
+    The sections of an index, as views onto one buffer (usually a read-only mmap, shared between processes).
+    >>> data = encode_index('test', 1, b'x' * 32, [pack_uint32s([3, 1, 4]), 'héllo'.encode('utf-8')])
+    >>> index = parse_index(data, 'test', 1, b'x' * 32)
+    >>> list(index.uint32s(0)), index.text(1)
+    ([3, 1, 4], 'héllo')
+    >>> parse_index(data, 'test', 2, b'x' * 32) is None
+    True
+    >>> parse_index(data, 'test', 1, b'y' * 32) is None
+    True
+    """
+    def __init__(self, buffer: memoryview, sections: Sequence[Tuple[int, int]]) -> None:
+        self._buffer = buffer
+        self._sections = sections
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def section(self, number: int) -> memoryview:
+        offset, length = self._sections[number]
+        return self._buffer[offset:offset + length]
+
+    def uint32s(self, number: int) -> memoryview:
+        return self.section(number).cast('I')
+
+    def text(self, number: int) -> str:
+        return str(self.section(number), 'utf-8')
+
+
+def parse_index(buffer: Union[bytes, mmap.mmap], kind: str, kind_version: int, source_hash: bytes) -> Optional[IndexFile]:
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        view.release()
+        return None
+    magic, format_version, found_kind, found_kind_version, found_hash, num_sections = HEADER.unpack_from(view)
+    expected = (MAGIC, FORMAT_VERSION, kind.encode('ascii'), kind_version, source_hash)
+    if (magic, format_version, found_kind.rstrip(b'\0'), found_kind_version, found_hash) != expected:
+        view.release()  # So that the caller can close the buffer.
+        return None
+    sections = [SECTION.unpack_from(view, HEADER.size + SECTION.size * i) for i in range(num_sections)]
+    return IndexFile(view, sections)
+
+
+def write_index(path: str, data: bytes) -> None:
+    # Write to a temporary file and rename it into place, so that other processes
+    # only ever see a complete index.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.idx')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def open_index(path: str, kind: str, kind_version: int, source_hash: bytes) -> Optional[IndexFile]:
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # mmap raises ValueError for an empty file.
+        return None
+    index = parse_index(buffer, kind, kind_version, source_hash)
+    if index is None:
+        buffer.close()
+    return index
+
+
+def load_index(
+    words_path: str,
+    kind: str,
+    kind_version: int,
+    build: Callable[[], Sequence[bytes]],
+    index_path: Optional[str] = None,
+    rebuild: bool = False,
+) -> IndexFile:
+    """
+    Memory-maps the index of `words_path`, first building it with `build` if it is missing or stale.
+    If the index cannot be saved, the freshly built index is used from memory instead.
+    """
+    source_hash = hash_file(words_path)
+    path = index_path or get_index_path(words_path, kind)
+    index = None if rebuild else open_index(path, kind, kind_version, source_hash)
+    if index is not None:
+        return index
+    data = encode_index(kind, kind_version, source_hash, build())
+    try:
+        write_index(path, data)
+    except OSError:
+        pass
+    else:
+        index = open_index(path, kind, kind_version, source_hash)
+    if index is None:
+        index = parse_index(data, kind, kind_version, source_hash)
+        assert index is not None  # It was just encoded with this kind, version and hash.
+    return index
+
+
+def pack_uint32s(numbers: Sequence[int]) -> bytes:
+    return array('I', numbers).tobytes()
+
+
+def pack_strings(strings: Sequence[str]) -> Tuple[bytes, bytes]:
+    """
+    Returns the offsets and the utf-8 text of `strings`, as read by `MappedStrings`.
+    """
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    return offsets.tobytes(), b''.join(encoded)
+
+
+class MappedStrings(Sequence[str]):
+    """
+    >>> offsets, text = pack_strings(['dog', 'fôg', ''])
+    >>> strings = MappedStrings(memoryview(offsets).cast('I'), memoryview(text))
+    >>> list(strings), len(strings)
+    (['dog', 'fôg', ''], 3)
+    """
+    def __init__(self, offsets: memoryview, text: memoryview) -> None:
+        self._offsets = offsets
+        self._text = text
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def encoded(self, index: int) -> bytes:
+        return bytes(self._text[self._offsets[index]:self._offsets[index + 1]])
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self._text[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+
+def _get_slot_count(num_keys: int) -> int:
+    """
+    A power of two, so that the hash table stays at most half full.
+    >>> _get_slot_count(0), _get_slot_count(3), _get_slot_count(4)
+    (1, 8, 16)
+    """
+    return 1 << (2 * num_keys).bit_length()
+
+
+def pack_word_dict(words: Mapping[str, Sequence[str]]) -> List[bytes]:
+    """
+    Packs a dict of lists of words into the sections read by `MappedWordDict`:
+    the keys, a hash table of the keys, the lists (as word ids), and the words.
+    """
+    keys = sorted(words, key=lambda k: k.encode('utf-8'))
+    slots = array('I', [0]) * _get_slot_count(len(keys))
+    mask = len(slots) - 1
+    for key_number, key in enumerate(keys):
+        slot = zlib.crc32(key.encode('utf-8')) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = key_number + 1
+    word_ids: dict = {}
+    posting_offsets = array('I', [0])
+    postings = array('I')
+    for key in keys:
+        postings.extend(word_ids.setdefault(word, len(word_ids)) for word in words[key])
+        posting_offsets.append(len(postings))
+    return [
+        *pack_strings(keys),
+        slots.tobytes(),
+        posting_offsets.tobytes(),
+        postings.tobytes(),
+        *pack_strings(list(word_ids)),
+    ]
+
+
+class MappedWordDict(Mapping[str, List[str]]):
+    """
+    A read-only view of a dict of lists of words, as packed by `pack_word_dict`.
+    Keys are found through the hash table in the index, so nothing needs to be loaded up front.
+    >>> sections = pack_word_dict({'?og': ['dog', 'log'], 'd?g': ['dog'], 'do?': ['dog']})
+    >>> words = MappedWordDict(parse_index(encode_index('test', 1, b'x' * 32, sections), 'test', 1, b'x' * 32))
+    >>> words['?og'], words.get('d?g'), words.get('l?g', [])
+    (['dog', 'log'], ['dog'], [])
+    >>> len(words), list(words)
+    (3, ['?og', 'd?g', 'do?'])
+    """
+    def __init__(self, index: IndexFile, first_section: int = 0) -> None:
+        self._keys = MappedStrings(index.uint32s(first_section), index.section(first_section + 1))
+        self._slots = index.uint32s(first_section + 2)
+        self._mask = len(self._slots) - 1
+        self._posting_offsets = index.uint32s(first_section + 3)
+        self._postings = index.uint32s(first_section + 4)
+        self._words = MappedStrings(index.uint32s(first_section + 5), index.section(first_section + 6))
+
+    def _find(self, key: str) -> int:
+        encoded_key = key.encode('utf-8')
+        slot = zlib.crc32(encoded_key) & self._mask
+        while True:
+            key_number = self._slots[slot] - 1
+            if key_number < 0 or self._keys.encoded(key_number) == encoded_key:
+                return key_number
+            slot = (slot + 1) & self._mask
+
+    def _get_list(self, position: int) -> List[str]:
+        start, end = self._posting_offsets[position], self._posting_offsets[position + 1]
+        return [self._words[word_id] for word_id in self._postings[start:end]]
+
+    def __getitem__(self, key: str) -> List[str]:
+        position = self._find(key) if isinstance(key, str) else -1
+        if position < 0:
+            raise KeyError(key)
+        return self._get_list(position)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Saves raising and catching a KeyError for every miss.
+        position = self._find(key)
+        return default if position < 0 else self._get_list(position)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def all_words(self) -> Sequence[str]:
+        """Every distinct word in the lists."""
+        return self._words
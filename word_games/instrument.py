@@ -0,0 +1,238 @@
+"""
+Opt-in counts and timings of the functions on the hot paths of the games, and the hit rates of their caches.
+
+Functions (and generator functions, timed while they are running rather than while they are paused)
+are decorated with `@instrument`, and are only timed inside `with instrumented() as report:`.
+Otherwise the decorator costs a call and a check of one flag.
+Recursive calls are counted, but their time is only added to the outermost call, so it is not counted twice.
+Each process has its own counts, so pass `--workers 1` to see inside worker processes.
+
+`profiled(path)` (the `--profile` option of the command lines) writes a report when it exits: a `.prof`
+file is written by cProfile (eg. for snakeviz or `python -m pstats`), and any other path gets the
+instrumented functions as collapsed stacks, one line per stack with its own time in microseconds,
+for flamegraph.pl or speedscope.
+"""
+import cProfile
+import functools
+import inspect
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+PROFILE_HELP = ('Write a cProfile report to FILE if it ends with .prof, or else collapsed stacks of the '
+                'instrumented functions for a flame graph (only of this process, so use --workers 1)')
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class CacheCounts:
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class Report:
+    calls: Dict[str, CallStats] = field(default_factory=dict)
+    caches: Dict[str, CacheCounts] = field(default_factory=dict)
+    stacks: Dict[str, float] = field(default_factory=dict)  # The seconds spent in each stack, and not below it.
+
+    def format(self) -> str:
+        lines = [f'{"Function":56} {"calls":>10} {"seconds":>10}']
+        for name, stats in sorted(self.calls.items(), key=lambda item: -item[1].seconds):
+            lines.append(f'{name:56} {stats.calls:10,} {stats.seconds:10.3f}')
+        if self.caches:
+            lines.append('')
+            lines.append(f'{"Cache":56} {"hits":>10} {"misses":>10} {"hit rate":>8}')
+            for name, counts in sorted(self.caches.items()):
+                lines.append(f'{name:56} {counts.hits:10,} {counts.misses:10,} {counts.hit_rate:8.1%}')
+        return '\n'.join(lines)
+
+    def get_collapsed_stacks(self) -> str:
+        return ''.join(f'{stack} {round(seconds * 1e6)}\n' for stack, seconds in sorted(self.stacks.items()))
+
+
+_enabled = False
+_calls: Dict[str, CallStats] = defaultdict(CallStats)
+_stacks: Dict[str, float] = defaultdict(float)
+# The instrumented calls running now, outermost first, each as [name, start time, seconds in the calls below it].
+_running: List[List[Any]] = []
+_running_names: Dict[str, int] = defaultdict(int)
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def register_cache(name: str, get_counts: Callable[[], Tuple[int, int]]) -> None:
+    """
+    Adds a cache to the reports, given a function returning its hits and misses so far.
+    """
+    _caches[name] = get_counts
+
+
+def register_lru_cache(name: str, function: Any) -> None:
+    """
+    Adds a function decorated with `functools.lru_cache` to the reports.
+    """
+    register_cache(name, lambda: (function.cache_info().hits, function.cache_info().misses))
+
+
+def _get_cache_counts() -> Dict[str, Tuple[int, int]]:
+    return {name: get_counts() for name, get_counts in _caches.items()}
+
+
+def _enter(name: str) -> bool:
+    # A call made from inside another call of the same function is counted, but not timed.
+    if _running_names[name]:
+        return False
+    _running_names[name] += 1
+    _running.append([name, time.perf_counter(), 0.0])
+    return True
+
+
+def _exit() -> None:
+    name, start_time, child_seconds = _running.pop()
+    _running_names[name] -= 1
+    seconds = time.perf_counter() - start_time
+    _calls[name].seconds += seconds
+    _stacks[';'.join([frame[0] for frame in _running] + [name])] += seconds - child_seconds
+    if _running:
+        _running[-1][2] += seconds
+
+
+def _iter_timed(name: str, iterator: Iterator[Any]) -> Iterator[Any]:
+    while True:
+        entered = _enter(name)
+        try:
+            value = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            if entered:
+                _exit()
+        yield value
+
+
+def instrument(function: F) -> F:
+    """
+    >>> @instrument
+    ... def count_down(n):
+    ...     yield n
+    ...     if n:
+    ...         yield from count_down(n - 1)
+    >>> list(count_down(2)), is_enabled()
+    ([2, 1, 0], False)
+    >>> with instrumented() as report:
+    ...     list(count_down(2))
+    [2, 1, 0]
+    >>> report.calls['word_games.instrument.count_down'].calls, list(report.stacks)
+    (3, ['word_games.instrument.count_down'])
+    """
+    module = function.__module__
+    if module == '__main__':
+        module = getattr(sys.modules['__main__'].__spec__, 'name', module)  # Eg. boggle.solve, run with -m.
+    name = f'{module}.{function.__qualname__}'
+
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return function(*args, **kwargs)
+            _calls[name].calls += 1
+            return _iter_timed(name, function(*args, **kwargs))
+        return generator_wrapper  # type: ignore
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _enabled:
+            return function(*args, **kwargs)
+        _calls[name].calls += 1
+        entered = _enter(name)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if entered:
+                _exit()
+    return wrapper  # type: ignore
+
+
+@contextmanager
+def instrumented() -> Iterator[Report]:
+    """
+    Counts and times the instrumented functions called inside it, and fills in the report when it exits.
+    >>> @instrument
+    ... def outer():
+    ...     return inner() + inner()
+    >>> @instrument
+    ... def inner():
+    ...     return 1
+    >>> with instrumented() as report:
+    ...     outer()
+    2
+    >>> {name.split('.')[-1]: stats.calls for name, stats in report.calls.items()}
+    {'outer': 1, 'inner': 2}
+    >>> sorted(stack.split('instrument.', 1)[1] for stack in report.stacks)
+    ['outer', 'outer;word_games.instrument.inner']
+    """
+    global _enabled
+    was_enabled = _enabled
+    _calls.clear()
+    _stacks.clear()
+    start_counts = _get_cache_counts()
+    report = Report()
+    _enabled = True
+    try:
+        yield report
+    finally:
+        _enabled = was_enabled
+        report.calls.update((name, CallStats(stats.calls, stats.seconds)) for name, stats in _calls.items())
+        report.stacks.update(_stacks)
+        for name, (hits, misses) in _get_cache_counts().items():
+            start_hits, start_misses = start_counts.get(name, (0, 0))
+            if hits < start_hits or misses < start_misses:
+                start_hits, start_misses = 0, 0  # The cache was replaced by a new one.
+            if hits + misses > start_hits + start_misses:
+                report.caches[name] = CacheCounts(hits - start_hits, misses - start_misses)
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """
+    Does nothing without a path, and otherwise writes a report to it when it exits (see above).
+    """
+    if path is None:
+        yield
+    elif path.endswith('.prof'):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
+            print(f'\nWrote a cProfile report to {path}', file=sys.stderr)
+    else:
+        # Also written when the command line exits with exit().
+        try:
+            with instrumented() as report:
+                yield
+        finally:
+            with open(path, 'w') as f:
+                f.write(report.get_collapsed_stacks())
+            print(f'\n{report.format()}\n\nWrote collapsed stacks to {path}', file=sys.stderr)
@@ -0,0 +1,367 @@
+"""
+A small HTTP service for all three games, which loads the word indexes once and answers many requests at a time.
+Run with eg.:
+    python -m word_games.service --port 8000 --workers 4
+
+and then ask eg.:
+    curl 'localhost:8000/boggle?board=cat,ode'
+    curl 'localhost:8000/ladder?start=party&target=grows'
+    curl 'localhost:8000/make5/line?key=.re..&letter=s'
+    curl 'localhost:8000/make5/grid?grid=.....,...n.,f..a.,t..nk,....s&letter=o'
+    curl 'localhost:8000/stats'
+
+The parameters can also be POSTed as a JSON object. The answers are JSON.
+
+The requests are read and answered on one asyncio event loop, while the solving is done in a pool of
+worker processes, which each memory-map the same prebuilt indexes (or in one thread, with `--workers 1`).
+While a request is being solved, any identical requests wait for its answer rather than solving it again.
+"""
+import asyncio
+import json
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import boggle.compile_words
+import make5.compile_words
+from boggle.solve import parse_board, solve_board
+from make5.calculate import GridAnalyzer
+from make5.choice import get_sorted_choices
+from make5.types import FrequencyDict
+from make5.utilities import SYMBOL, read_frequencies
+from word_games.cache import LRUCache, TieredCache
+from word_ladder.graph import load_graph
+
+DEFAULT_PATH = './data/words.txt'
+DEFAULT_TILES_PATH = './make5/tiles.txt'
+MAX_BODY_BYTES = 64 * 1024
+CACHE_SIZE = 10000
+CACHE_MAX_AGE = 3600.0
+
+Params = Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class Games:
+    boggle_words: Any
+    make5_words: Any
+    frequency: FrequencyDict
+    ladder_graph: Any
+    # The answers to recent boards (in any of their 8 orientations) and make5 keys, in this process.
+    cache: TieredCache
+
+
+def load_games(path: str, tiles_path: str) -> Games:
+    return Games(
+        boggle.compile_words.load_words(path),
+        make5.compile_words.load_words(path),
+        read_frequencies(tiles_path),
+        load_graph(path),
+        TieredCache(LRUCache(CACHE_SIZE, max_age=CACHE_MAX_AGE)),
+    )
+
+
+def get_text(params: Params, name: str, default: Optional[str] = None) -> str:
+    value = params.get(name, default)
+    if value is None:
+        raise KeyError(name)
+    if not isinstance(value, str):
+        raise ValueError(f'The parameter {name!r} must be a string')
+    return value
+
+
+def get_letter(params: Params, name: str, default: Optional[str] = None) -> str:
+    """
+    One letter, or else the default (eg. '' when the letter is optional).
+    """
+    letter = get_text(params, name, default).lower()
+    if letter != default and not (len(letter) == 1 and 'a' <= letter <= 'z'):
+        raise ValueError(f'The parameter {name!r} must be one letter')
+    return letter
+
+
+def get_int(params: Params, name: str, default: Optional[int] = None) -> Optional[int]:
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'The parameter {name!r} must be a whole number')
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'The parameter {name!r} must be a whole number') from None
+
+
+def solve_boggle(games: Games, params: Params) -> Dict[str, Any]:
+    board = parse_board(get_text(params, 'board'))
+    if not board:
+        raise ValueError('The board is empty')
+    result = solve_board(board, games.boggle_words, get_int(params, 'min_word_length'), cache=games.cache)
+    return {'board': board, 'count': len(result), 'words': result.words}
+
+
+def solve_ladder(games: Games, params: Params) -> Dict[str, Any]:
+    start_word, target_word = get_text(params, 'start').lower(), get_text(params, 'target').lower()
+    limit = get_int(params, 'limit')
+    if limit is None:
+        limit = 100
+    # There can be very many ladders, so only the first few are listed (and at least one, for the steps).
+    ladders = list(islice(games.ladder_graph.iter_ladders(start_word, target_word), max(limit, 1)))
+    return {
+        'start': start_word,
+        'target': target_word,
+        'steps': len(ladders[0]) - 1 if ladders else None,
+        'count': games.ladder_graph.count_ladders(start_word, target_word),
+        'ladders': ladders[:limit],
+    }
+
+
+def solve_make5_line(games: Games, params: Params) -> Dict[str, Any]:
+    """
+    Like `make5.play_line`: the best choices for a key, or for each place the letter could go in it.
+    """
+    key = get_text(params, 'key').lower().replace('.', SYMBOL)
+    letter = get_letter(params, 'letter', '')
+    limit = get_int(params, 'limit', 10)
+    keys = [(key, None)] if not letter else [
+        (key[:position] + letter + key[position + 1:], position)
+        for position in range(len(key)) if key[position] == SYMBOL
+    ]
+    answers = []
+    for this_key, required_index in keys:
+        choices = get_sorted_choices(this_key, required_index, games.make5_words, games.frequency, games.cache)
+        answers.append({
+            'key': this_key,
+            'total': sum(choice.adjusted_score for choice in choices),
+            'choices': [
+                {'word': choice.word, 'score': choice.score, 'adjusted_score': choice.adjusted_score}
+                for choice in choices[::-1][:limit]
+            ],
+        })
+    return {'key': key, 'letter': letter, 'answers': answers}
+
+
+def solve_make5_grid(games: Games, params: Params) -> Dict[str, Any]:
+    """
+    Like `make5.solve`: the best places for the letter on the grid, looking one tile ahead.
+    """
+    grid = get_text(params, 'grid').lower().replace('.', SYMBOL).replace(' ', '').strip(',').split(',')
+    letter = get_letter(params, 'letter')
+    limit = get_int(params, 'limit', 5)
+    if len({len(row) for row in grid}) != 1:
+        raise ValueError('The rows of the grid must all be the same length')
+    record = GridAnalyzer(grid, games.make5_words, games.frequency).calculate(letter)
+    cells = sorted(record, key=lambda cell: record[cell]['best_increase'], reverse=True)[:limit]
+    return {
+        'grid': grid,
+        'letter': letter,
+        'locations': [
+            {
+                'cell': cell,
+                'best_increase': record[cell]['best_increase'],
+                'score': record[cell]['crosshair'].score,
+                'row': record[cell]['crosshair'].row,
+                'col': record[cell]['crosshair'].col,
+                'best_other_letter': record[cell]['best_other_crosshair'].letter,
+            }
+            for cell in cells
+        ],
+    }
+
+
+ENDPOINTS: Dict[str, Callable[[Games, Params], Dict[str, Any]]] = {
+    '/boggle': solve_boggle,
+    '/ladder': solve_ladder,
+    '/make5/line': solve_make5_line,
+    '/make5/grid': solve_make5_grid,
+}
+
+_worker_games: Optional[Games] = None
+
+
+def _load_worker_games(path: str, tiles_path: str) -> None:
+    global _worker_games
+    _worker_games = load_games(path, tiles_path)
+
+
+def _solve(endpoint: str, params: Params) -> Dict[str, Any]:
+    assert _worker_games is not None
+    return ENDPOINTS[endpoint](_worker_games, params)
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    solved: int = 0
+    coalesced: int = 0  # The requests which were answered by an identical request already being solved.
+    errors: int = 0
+
+
+class Service:
+    """
+    >>> import os
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'word_ladder', 'test_data.txt')
+    >>> tiles_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'make5', 'test_tiles.txt')
+    >>> service = Service(path, tiles_path, workers=1)
+    >>> asyncio.run(service.get('/ladder', {'start': 'dog', 'target': 'cat'}))
+    (200, {'start': 'dog', 'target': 'cat', 'steps': 3, 'count': 2, 'ladders': [['dog', 'cog', 'cot', 'cat'], ['dog', 'dot', 'cot', 'cat']]})
+    >>> async def get_twice():
+    ...     return await asyncio.gather(service.get('/boggle', {'board': 'dog,xxx'}), service.get('/boggle', {'board': 'dog,xxx'}))
+    >>> asyncio.run(get_twice())
+    [(200, {'board': ['dog', 'xxx'], 'count': 1, 'words': ['dog']}), (200, {'board': ['dog', 'xxx'], 'count': 1, 'words': ['dog']})]
+    >>> asyncio.run(service.get('/boggle', {})), asyncio.run(service.get('/chess', {}))
+    ((400, {'error': "Missing parameter 'board'"}), (404, {'error': 'No such endpoint: /chess'}))
+    >>> asyncio.run(service.get('/ladder', {'start': 1, 'target': 'cat'}))
+    (400, {'error': "The parameter 'start' must be a string"})
+    >>> asyncio.run(service.get('/make5/grid', {'grid': '???,???,???', 'letter': '1'}))
+    (400, {'error': "The parameter 'letter' must be one letter"})
+    >>> ENDPOINTS['/fail'] = lambda games, params: 1 / 0
+    >>> asyncio.run(service.get('/fail', {}))
+    (500, {'error': 'Could not answer the request (ZeroDivisionError)'})
+    >>> del ENDPOINTS['/fail']
+    >>> service.stats
+    ServiceStats(requests=8, solved=2, coalesced=1, errors=5)
+    >>> service.close()
+    """
+    def __init__(self, path: str = DEFAULT_PATH, tiles_path: str = DEFAULT_TILES_PATH,
+                 workers: Optional[int] = None) -> None:
+        # Load the indexes here first, so that they are built once, rather than by every worker.
+        _load_worker_games(path, tiles_path)
+        self.executor: Executor = (
+            ThreadPoolExecutor(1) if workers == 1
+            else ProcessPoolExecutor(workers, initializer=_load_worker_games, initargs=(path, tiles_path))
+        )
+        self.stats = ServiceStats()
+        self._in_flight: Dict[Tuple[str, str], 'asyncio.Future[Dict[str, Any]]'] = {}
+
+    async def solve(self, endpoint: str, params: Params) -> Dict[str, Any]:
+        request_key = (endpoint, json.dumps(params, sort_keys=True))
+        future = self._in_flight.get(request_key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, _solve, endpoint, dict(params))
+        self._in_flight[request_key] = future
+        try:
+            answer = await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(request_key, None)
+        self.stats.solved += 1
+        return answer
+
+    async def get(self, endpoint: str, params: Params) -> Tuple[int, Dict[str, Any]]:
+        """
+        The HTTP status and the JSON answer for a request.
+        """
+        self.stats.requests += 1
+        if endpoint == '/stats':
+            stats: Dict[str, Any] = {**self.stats.__dict__, 'in_flight': len(self._in_flight)}
+            if isinstance(self.executor, ThreadPoolExecutor) and _worker_games is not None:
+                # Each worker process has its own cache, so there is only one to show when solving in a thread.
+                stats['cache'] = {**_worker_games.cache.stats.__dict__, 'hit_rate': _worker_games.cache.stats.hit_rate}
+            return 200, stats
+        if endpoint not in ENDPOINTS:
+            self.stats.errors += 1
+            return 404, {'error': f'No such endpoint: {endpoint}'}
+        try:
+            return 200, await self.solve(endpoint, params)
+        except KeyError as error:
+            self.stats.errors += 1
+            return 400, {'error': f'Missing parameter {error}'}
+        except ValueError as error:
+            self.stats.errors += 1
+            return 400, {'error': str(error)}
+        except Exception as error:
+            self.stats.errors += 1
+            return 500, {'error': f'Could not answer the request ({type(error).__name__})'}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the HTTP/1.1 requests on a connection, one after another, until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split(maxsplit=2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1')
+                    if not line.strip():
+                        break
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                url = urlsplit(target)
+                params: Dict[str, Any] = dict(parse_qsl(url.query))
+                status, answer = 200, {}
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, answer = 413, {'error': 'The request is too large'}
+                elif length:
+                    body = await reader.readexactly(length)
+                    try:
+                        params.update(json.loads(body))
+                    except (ValueError, TypeError):
+                        status, answer = 400, {'error': 'The body must be a JSON object'}
+                if status == 200 and method not in ('GET', 'POST'):
+                    status, answer = 405, {'error': f'Method not allowed: {method}'}
+                if status == 200:
+                    status, answer = await self.get(url.path.rstrip('/') or '/', params)
+                keep_alive = version.strip() == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, status, answer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # The client went away, or sent something which is not HTTP.
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer: asyncio.StreamWriter, status: int, answer: Dict[str, Any], keep_alive: bool) -> None:
+        body = json.dumps(answer).encode('utf-8')
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+                   500: 'Internal Server Error'}
+        writer.write(
+            f'HTTP/1.1 {status} {reasons.get(status, "Error")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def serve(self, host: str, port: int, started: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            if started is not None:
+                await started()
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Serve the answers to all three games over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, help='The number of worker processes (1 to solve in a thread instead)')
+    parser.add_argument('--tiles', default=DEFAULT_TILES_PATH, help='The frequency of each Make five tile')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    args = parser.parse_args()
+
+    service = Service(args.words, args.tiles, args.workers)
+
+    async def print_started() -> None:
+        print(f'Serving on http://{args.host}:{args.port}/')
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, print_started))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
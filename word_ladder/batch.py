@@ -0,0 +1,228 @@
+"""
+Answer a batch of start and target words at once, eg. to grade puzzles by how hard they are.
+
+Queries with the same start word share one breadth first search, which answers all their targets.
+Optionally also work out the eccentricity of each start word (the most steps it takes to reach any word
+it is connected to), and the diameter of its connected component (the greatest eccentricity in it).
+
+Run with eg.:
+    python -m word_ladder.batch pairs.txt --format csv --eccentricity
+where each line of pairs.txt is a start and a target word, separated by a space or a comma.
+"""
+import csv
+import json
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+from word_ladder.graph import WordGraph, build_graph, load_graph
+
+DEFAULT_PATH = './data/words.txt'
+
+Query = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class LadderAnswer:
+    start: str
+    target: str
+    steps: Optional[int]  # None if there is no ladder.
+    ladders: int  # The number of shortest ladders.
+    eccentricity: Optional[int] = None
+    diameter: Optional[int] = None
+
+
+def parse_query(line: str) -> Query:
+    """
+    >>> parse_query(' Dog, cat\\n'), parse_query('dog cat')
+    (('dog', 'cat'), ('dog', 'cat'))
+    """
+    start_word, target_word = line.lower().replace(',', ' ').split()
+    return start_word, target_word
+
+
+def count_ladders_from(graph: WordGraph, distances: Sequence[int], target_id: int, counts: Dict[int, int]) -> int:
+    """
+    The number of shortest ladders to the target, given the distances from their start,
+    without listing them. `counts` remembers the words already counted, for the same start.
+    """
+    if target_id not in counts:
+        if distances[target_id] <= 0:
+            counts[target_id] = 1 if distances[target_id] == 0 else 0
+        else:
+            counts[target_id] = sum(
+                count_ladders_from(graph, distances, previous_id, counts)
+                for previous_id in graph.get_neighbor_ids(target_id)
+                if distances[previous_id] == distances[target_id] - 1
+            )
+    return counts[target_id]
+
+
+def answer_start(graph: WordGraph, start_word: str, target_words: Iterable[str], eccentricity: bool = False) -> List[LadderAnswer]:
+    """
+    Answers all the queries from one start word with a single search.
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'fin', 'fig', 'fit', 'cat']:
+    ...     words = add_to_words_dict(words, w)
+    >>> graph = build_graph(words)
+    >>> for answer in answer_start(graph, 'dog', ['fit', 'cat', 'cow', 'dog'], eccentricity=True):
+    ...     print(answer)
+    LadderAnswer(start='dog', target='fit', steps=3, ladders=2, eccentricity=3, diameter=None)
+    LadderAnswer(start='dog', target='cat', steps=None, ladders=0, eccentricity=3, diameter=None)
+    LadderAnswer(start='dog', target='cow', steps=None, ladders=0, eccentricity=3, diameter=None)
+    LadderAnswer(start='dog', target='dog', steps=0, ladders=1, eccentricity=3, diameter=None)
+    """
+    target_words = list(target_words)
+    start_id = graph.get_id(start_word)
+    if start_id < 0:
+        return [LadderAnswer(start_word, target_word, None, 0) for target_word in target_words]
+    target_ids = [graph.get_id(target_word) for target_word in target_words]
+    # Targets in other components would only make the search visit the whole of this one.
+    connected_ids = [
+        target_id for target_id in target_ids
+        if target_id >= 0 and graph.components[target_id] == graph.components[start_id]
+    ]
+    distances = graph.get_distances(start_id, () if eccentricity else connected_ids or (start_id,))
+    start_eccentricity = max(distances) if eccentricity else None
+    counts: Dict[int, int] = {}
+    return [
+        LadderAnswer(
+            start_word,
+            target_word,
+            distances[target_id] if target_id >= 0 and distances[target_id] >= 0 else None,
+            count_ladders_from(graph, distances, target_id, counts) if target_id >= 0 else 0,
+            start_eccentricity,
+        )
+        for target_word, target_id in zip(target_words, target_ids)
+    ]
+
+
+def get_diameter(graph: WordGraph, component: int) -> int:
+    """
+    The most steps between any two connected words in the component.
+    This searches from every word in the component, so it is slow for large components.
+    """
+    word_ids = [word_id for word_id, label in enumerate(graph.components) if label == component]
+    diameter: int = max(max(graph.get_distances(word_id)) for word_id in word_ids)
+    return diameter
+
+
+def group_queries(queries: Iterable[Query]) -> Dict[str, List[str]]:
+    """
+    >>> group_queries([('dog', 'cat'), ('fig', 'fin'), ('dog', 'cot'), ('dog', 'cat')])
+    {'dog': ['cat', 'cot'], 'fig': ['fin']}
+    """
+    groups: Dict[str, Dict[str, None]] = {}
+    for start_word, target_word in queries:
+        groups.setdefault(start_word, {})[target_word] = None
+    return {start_word: list(target_words) for start_word, target_words in groups.items()}
+
+
+_worker_graph: Optional[WordGraph] = None
+
+
+def _load_worker_graph(path: str) -> None:
+    global _worker_graph
+    _worker_graph = load_graph(path)
+
+
+def _answer_starts(groups: Sequence[Tuple[str, List[str]]], eccentricity: bool) -> List[LadderAnswer]:
+    assert _worker_graph is not None
+    return [
+        answer
+        for start_word, target_words in groups
+        for answer in answer_start(_worker_graph, start_word, target_words, eccentricity)
+    ]
+
+
+def _get_diameter(component: int) -> int:
+    assert _worker_graph is not None
+    return get_diameter(_worker_graph, component)
+
+
+def answer_queries(
+    queries: Sequence[Query],
+    path: str = DEFAULT_PATH,
+    eccentricity: bool = False,
+    diameter: bool = False,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> List[LadderAnswer]:
+    """
+    Answers the queries across a pool of worker processes, in the order they were given.
+    Each worker memory-maps the same prebuilt graph. If `workers` is 1, they are answered in this process instead.
+    >>> import os
+    >>> path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_data.txt')
+    >>> queries = [('dog', 'cot'), ('cat', 'cot'), ('dog', 'cat'), ('dog', 'dog'), ('dog', 'bad')]
+    >>> answers = answer_queries(queries, path, diameter=True, workers=2, chunk_size=1)
+    >>> [(answer.start, answer.target, answer.steps, answer.ladders, answer.diameter) for answer in answers]
+    [('dog', 'cot', 2, 2, 4), ('cat', 'cot', 1, 1, 4), ('dog', 'cat', 3, 2, 4), ('dog', 'dog', 0, 1, 4), ('dog', 'bad', None, 0, 4)]
+    >>> answers == answer_queries(queries, path, diameter=True, workers=1)
+    True
+    """
+    _load_worker_graph(path)  # Build the graph once, before the workers start.
+    assert _worker_graph is not None
+    groups = list(group_queries(queries).items())
+    chunks = [groups[i:i + chunk_size] for i in range(0, len(groups), chunk_size)]
+    start_ids = (_worker_graph.get_id(start_word) for start_word, _ in groups)
+    components = sorted({_worker_graph.components[start_id] for start_id in start_ids if start_id >= 0}) if diameter else []
+    if workers == 1:
+        answers = [answer for chunk in chunks for answer in _answer_starts(chunk, eccentricity)]
+        diameters = [_get_diameter(component) for component in components]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_load_worker_graph, initargs=(path,)) as executor:
+            answer_futures = [executor.submit(_answer_starts, chunk, eccentricity) for chunk in chunks]
+            diameters = list(executor.map(_get_diameter, components))
+            answers = [answer for future in answer_futures for answer in future.result()]
+    diameter_of = dict(zip(components, diameters))
+    by_query = {}
+    for answer in answers:
+        start_id = _worker_graph.get_id(answer.start)
+        if diameter and start_id >= 0:
+            answer = replace(answer, diameter=diameter_of[_worker_graph.components[start_id]])
+        by_query[answer.start, answer.target] = answer
+    return [by_query[query] for query in queries]
+
+
+def write_answers(answers: Iterable[LadderAnswer], output: TextIO, output_format: str = 'jsonl') -> None:
+    """
+    >>> import sys
+    >>> answers = [LadderAnswer('dog', 'fit', 3, 2), LadderAnswer('dog', 'cat', None, 0)]
+    >>> write_answers(answers, sys.stdout, 'csv')
+    start,target,steps,ladders,eccentricity,diameter
+    dog,fit,3,2,,
+    dog,cat,,0,,
+    >>> write_answers(answers[:1], sys.stdout)
+    {"start": "dog", "target": "fit", "steps": 3, "ladders": 2, "eccentricity": null, "diameter": null}
+    """
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, [field.name for field in fields(LadderAnswer)], lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(asdict(answer) for answer in answers)
+    elif output_format == 'jsonl':
+        for answer in answers:
+            output.write(json.dumps(asdict(answer)) + '\n')
+    else:
+        raise ValueError(f'Unknown output format "{output_format}"')
+
+
+if __name__ == '__main__':
+    import sys
+
+    parser = ArgumentParser(description='Answer a batch of word ladder queries.')
+    parser.add_argument('queries', help='A file (or - for stdin) with a start and a target word on each line')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--output', help='The file to write to, instead of stdout')
+    parser.add_argument('--eccentricity', action='store_true', help='Also find the eccentricity of each start word')
+    parser.add_argument('--diameter', action='store_true', help='Also find the diameter of each start word\'s component')
+    parser.add_argument('--workers', type=int, help='The number of worker processes')
+    parser.add_argument('--words', default=DEFAULT_PATH, help='The word list')
+    args = parser.parse_args()
+
+    with (sys.stdin if args.queries == '-' else open(args.queries, 'r')) as f:
+        queries = [parse_query(line) for line in f if line.strip()]
+    answers = answer_queries(queries, args.words, args.eccentricity, args.diameter, args.workers)
+    with (sys.stdout if args.output is None else open(args.output, 'w', newline='')) as output:
+        write_answers(answers, output, args.format)
@@ -1,8 +1,13 @@
 from typing import Optional
 
+from word_games.index_file import MappedWordDict, load_index, pack_word_dict
+from word_games.instrument import instrument
 from word_ladder.types import WordDict
 from word_ladder.utilities import get_word_with_letter_missing
 
+INDEX_KIND = 'word_ladder'
+INDEX_VERSION = 1
+
 
 def add_to_words_dict(words: WordDict, word: str) -> WordDict:
     """
@@ -21,6 +26,7 @@ def add_to_words_dict(words: WordDict, word: str) -> WordDict:
             words[key] = [word]
     return words
 
+@instrument
 def read_words(path: str, words: Optional[WordDict] = None) -> WordDict:
     updated_words = {} if words is None else words
     with open(path, 'r') as f:
@@ -28,3 +34,11 @@ def read_words(path: str, words: Optional[WordDict] = None) -> WordDict:
             word = word_with_return.strip()
             updated_words = add_to_words_dict(updated_words, word)
     return updated_words
+
+@instrument
+def load_words(path: str, index_path: Optional[str] = None, rebuild: bool = False) -> MappedWordDict:
+    """
+    Memory-maps the prebuilt index of the words in `path`, building and saving it first if needed.
+    """
+    index = load_index(path, INDEX_KIND, INDEX_VERSION, lambda: pack_word_dict(read_words(path)), index_path, rebuild)
+    return MappedWordDict(index)
@@ -0,0 +1,226 @@
+"""
+The word ladder neighbour graph, worked out once and saved next to the word list.
+
+Words are numbered in sorted order, and the neighbours of word i are
+    neighbors[offsets[i]:offsets[i + 1]]
+(the "compressed sparse row" form). Words in the same connected component share a label,
+so whether there is any ladder between two words is a single comparison.
+
+Build it with:
+    python -m word_ladder.graph [path/to/words.txt]
+"""
+from array import array
+from bisect import bisect_left
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from word_games.index_file import IndexFile, MappedStrings, load_index, pack_strings
+from word_ladder.compile_words import read_words
+from word_ladder.types import WordIndex
+from word_ladder.utilities import get_all_words, get_neighbors
+
+INDEX_KIND = 'ladder_graph'
+INDEX_VERSION = 1
+
+
+class WordGraph:
+    """
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'fig', 'fin', 'cat', 'cot']:
+    ...     words = add_to_words_dict(words, w)
+    >>> graph = build_graph(words)
+    >>> [graph.words[i] for i in graph.get_neighbor_ids(graph.get_id('dog'))]
+    ['dig', 'fog', 'log']
+    >>> graph.is_connected('dog', 'fin'), graph.is_connected('dog', 'cat'), graph.is_connected('dog', 'cow')
+    (True, False, False)
+    >>> graph.get_ladders('log', 'fin'), graph.get_ladders('dig', 'log')
+    ([['log', 'fog', 'fig', 'fin']], [['dig', 'dog', 'log']])
+    >>> list(graph.iter_ladders('log', 'dig')), graph.count_ladders('log', 'dig'), graph.count_ladders('log', 'cat')
+    ([['log', 'dog', 'dig']], 1, 0)
+    """
+    def __init__(self, words: Sequence[str], offsets: Sequence[int], neighbors: Sequence[int], components: Sequence[int]) -> None:
+        self.words = words
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.components = components
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.get_id(word) >= 0
+
+    def get_id(self, word: str) -> int:
+        """The number of the word, or -1 if it is not in the graph."""
+        index = bisect_left(self.words, word)  # type: ignore
+        return index if index < len(self.words) and self.words[index] == word else -1
+
+    def get_neighbor_ids(self, word_id: int) -> Sequence[int]:
+        return self.neighbors[self.offsets[word_id]:self.offsets[word_id + 1]]
+
+    def is_connected(self, word: str, other_word: str) -> bool:
+        word_id, other_id = self.get_id(word), self.get_id(other_word)
+        return word_id >= 0 and other_id >= 0 and self.components[word_id] == self.components[other_id]
+
+    def get_distances(self, source_id: int, target_ids: Collection[int] = ()) -> array:
+        """
+        The number of steps from the source to each word (or -1 if there is no ladder).
+        If there are targets, it stops early once they have all been reached.
+        """
+        distances = array('i', [-1]) * len(self.words)
+        distances[source_id] = 0
+        frontier = [source_id]
+        offsets, neighbors = self.offsets, self.neighbors
+        remaining = set(target_ids)
+        remaining.discard(source_id)
+        while frontier and (not target_ids or remaining):
+            next_frontier = []
+            for word_id in frontier:
+                distance = distances[word_id] + 1
+                for neighbor_id in neighbors[offsets[word_id]:offsets[word_id + 1]]:
+                    if distances[neighbor_id] < 0:
+                        distances[neighbor_id] = distance
+                        next_frontier.append(neighbor_id)
+                        remaining.discard(neighbor_id)
+            frontier = next_frontier
+        return distances
+
+    def get_distances_to(self, start_word: str, target_word: str) -> Optional[Tuple[int, array]]:
+        """
+        The start's number and the distances to the target, or None if there is no ladder between them.
+        """
+        if not self.is_connected(start_word, target_word):
+            return None
+        start_id, target_id = self.get_id(start_word), self.get_id(target_word)
+        return start_id, self.get_distances(target_id, (start_id,))
+
+    def iter_ladder_ids(self, start_id: int, distances: Sequence[int]) -> Iterator[List[int]]:
+        """
+        Yields all the shortest ladders from the start, given the distances to their target, one at a time.
+        The neighbours of each word are in order, so the ladders are too.
+        """
+        if distances[start_id] < 0:
+            return
+        ladder = [start_id]
+        choices = [iter(self.get_neighbor_ids(start_id))] if distances[start_id] > 0 else []
+        if not choices:
+            yield list(ladder)
+        while choices:
+            next_id = next(choices[-1], None)
+            if next_id is None:
+                choices.pop()
+                ladder.pop()
+            elif distances[next_id] == distances[ladder[-1]] - 1:
+                ladder.append(next_id)
+                if distances[next_id] == 0:
+                    yield list(ladder)
+                    ladder.pop()
+                else:
+                    choices.append(iter(self.get_neighbor_ids(next_id)))
+
+    def iter_ladders(self, start_word: str, target_word: str) -> Iterator[List[str]]:
+        """
+        Yields all the shortest ladders between two words in the graph, in order, one at a time,
+        so that eg. `itertools.islice` can take the first few of very many.
+        """
+        found = self.get_distances_to(start_word, target_word)
+        if found is not None:
+            start_id, distances = found
+            for ladder in self.iter_ladder_ids(start_id, distances):
+                yield [self.words[word_id] for word_id in ladder]
+
+    def get_ladders(self, start_word: str, target_word: str) -> List[List[str]]:
+        """
+        All the shortest ladders between two words in the graph, in order.
+        There can be very many, so prefer `iter_ladders` and `count_ladders` for long words.
+        """
+        return list(self.iter_ladders(start_word, target_word))
+
+    def count_ladders(self, start_word: str, target_word: str) -> int:
+        """
+        The number of shortest ladders between two words, without listing them.
+        """
+        found = self.get_distances_to(start_word, target_word)
+        if found is None:
+            return 0
+        start_id, distances = found
+        # Step towards the target one distance at a time, counting the ladders to each word on the way.
+        counts: Dict[int, int] = {start_id: 1}
+        for distance in range(distances[start_id], 0, -1):
+            next_counts: Dict[int, int] = {}
+            for word_id, count in counts.items():
+                for next_id in self.get_neighbor_ids(word_id):
+                    if distances[next_id] == distance - 1:
+                        next_counts[next_id] = next_counts.get(next_id, 0) + count
+            counts = next_counts
+        return sum(counts.values())
+
+    def get_sections(self) -> List[bytes]:
+        return [
+            *pack_strings(self.words),
+            array('I', self.offsets).tobytes(),
+            array('I', self.neighbors).tobytes(),
+            array('I', self.components).tobytes(),
+        ]
+
+    @classmethod
+    def from_index(cls, index: IndexFile) -> 'WordGraph':
+        return cls(MappedStrings(index.uint32s(0), index.section(1)), index.uint32s(2), index.uint32s(3), index.uint32s(4))
+
+
+def label_components(offsets: Sequence[int], neighbors: Sequence[int]) -> array:
+    """
+    Numbers the connected components of the graph, in order of their smallest word.
+    >>> list(label_components([0, 1, 2, 2, 3, 4], [1, 0, 4, 3]))
+    [0, 0, 1, 2, 2]
+    """
+    components = array('I', [0]) * (len(offsets) - 1)
+    labelled = bytearray(len(offsets) - 1)
+    label = 0
+    for first_id in range(len(offsets) - 1):
+        if labelled[first_id]:
+            continue
+        labelled[first_id] = 1
+        frontier = [first_id]
+        while frontier:
+            word_id = frontier.pop()
+            components[word_id] = label
+            for neighbor_id in neighbors[offsets[word_id]:offsets[word_id + 1]]:
+                if not labelled[neighbor_id]:
+                    labelled[neighbor_id] = 1
+                    frontier.append(neighbor_id)
+        label += 1
+    return components
+
+
+def build_graph(words: WordIndex) -> WordGraph:
+    sorted_words = sorted(get_all_words(words))
+    ids = {word: word_id for word_id, word in enumerate(sorted_words)}
+    offsets = array('I', [0])
+    neighbors = array('I')
+    for word in sorted_words:
+        neighbors.extend(sorted(ids[neighbor] for neighbor in get_neighbors(word, words) if neighbor != word))
+        offsets.append(len(neighbors))
+    return WordGraph(sorted_words, offsets, neighbors, label_components(offsets, neighbors))
+
+
+def load_graph(path: str, index_path: Optional[str] = None, rebuild: bool = False) -> WordGraph:
+    """
+    Memory-maps the saved graph of the words in `path`, building and saving it first if needed.
+    """
+    index = load_index(path, INDEX_KIND, INDEX_VERSION, lambda: build_graph(read_words(path)).get_sections(),
+                       index_path, rebuild)
+    return WordGraph.from_index(index)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from word_games.index_file import get_index_path
+
+    path = sys.argv[1] if len(sys.argv) > 1 else './data/words.txt'
+    start_time = time.perf_counter()
+    graph = load_graph(path, rebuild=True)
+    print(f'Wrote {get_index_path(path, INDEX_KIND)} in {time.perf_counter() - start_time:.2f}s: '
+          f'{len(graph):,} words, {len(graph.neighbors) // 2:,} pairs of neighbours, '
+          f'{max(graph.components, default=-1) + 1:,} connected components')
@@ -0,0 +1,64 @@
+"""
+Watch the rounds of a word ladder search, eg.
+
+    profile = RoundProfile()
+    build_rungs('party', 'grows', words, progress=profile)
+    print(profile.get_summary())
+
+The searches are silent unless they are given a callback.
+"""
+from dataclasses import dataclass
+from typing import Callable, Collection, List
+
+
+@dataclass(frozen=True)
+class RoundStats:
+    round: int  # The start word is round 1.
+    words: Collection[str]  # The words first reached this round.
+    visited: int  # The number of words reached so far, including these.
+    seconds: float  # The time this round took.
+
+    @property
+    def frontier(self) -> int:
+        return len(self.words)
+
+
+ProgressCallback = Callable[[RoundStats], None]
+
+
+def print_progress(stats: RoundStats) -> None:
+    """
+    >>> print_progress(RoundStats(2, {'log', 'dig', 'fog'}, 4, 0.01))
+    Round 2:   3 possible words, eg. dig, fog, log
+    """
+    if stats.words:
+        print(f'Round {stats.round}: {stats.frontier:3} possible words, eg. {", ".join(sorted(stats.words)[:6])}')
+
+
+class RoundProfile:
+    """
+    A progress callback which keeps the statistics of every round, to sum up afterwards.
+    >>> profile = RoundProfile()
+    >>> profile(RoundStats(2, {'log', 'dig', 'fog'}, 4, 0.25))
+    >>> profile(RoundStats(3, {'fig'}, 5, 0.5))
+    >>> print(profile.get_summary())
+    2 rounds reached 5 words in 750.0ms (7 words per second); the slowest was round 3, with 1 words in 500.0ms
+    """
+    def __init__(self) -> None:
+        self.rounds: List[RoundStats] = []
+
+    def __call__(self, stats: RoundStats) -> None:
+        self.rounds.append(stats)
+
+    @property
+    def seconds(self) -> float:
+        return sum(stats.seconds for stats in self.rounds)
+
+    def get_summary(self) -> str:
+        if not self.rounds:
+            return 'No rounds'
+        slowest = max(self.rounds, key=lambda stats: stats.seconds)
+        visited = self.rounds[-1].visited
+        return (f'{len(self.rounds)} rounds reached {visited:,} words in {1000 * self.seconds:.1f}ms '
+                f'({visited / max(self.seconds, 1e-9):,.0f} words per second); the slowest was round {slowest.round}, '
+                f'with {slowest.frontier:,} words in {1000 * slowest.seconds:.1f}ms')
@@ -1,9 +1,28 @@
-from typing import Dict, Iterable, Optional
-from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+
+
+def get_parents(path: Mapping[str, Iterable[str]]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Reverses the path, keeping the words leading to each word in the order of the path.
+    >>> get_parents({'dog': ('dig', 'fog'), 'fin': ('fig', 'dig')})
+    {'dig': ('dog', 'fin'), 'fog': ('dog',), 'fig': ('fin',)}
+    """
+    parents: Dict[str, List[str]] = {}
+    for source_word, next_words in path.items():
+        for word in next_words:
+            parents.setdefault(word, []).append(source_word)
+    return {word: tuple(source_words) for word, source_words in parents.items()}
+
 
 @dataclass(frozen=True)
 class Rung:
     previous: Optional['Rung']
-    words: Iterable[str]
-    path: Dict[str, Iterable[str]]
+    words: Collection[str]
+    path: Mapping[str, Sequence[str]]
+    # The words on the previous rung leading to each word on this one; worked out from the path if not given.
+    parents: Dict[str, Tuple[str, ...]] = field(default_factory=dict, compare=False, repr=False)
 
+    def __post_init__(self) -> None:
+        if self.path and not self.parents:
+            object.__setattr__(self, 'parents', get_parents(self.path))
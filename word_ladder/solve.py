@@ -1,12 +1,16 @@
-from word_ladder.compile_words import read_words
-from word_ladder.types import WordDict
-from word_ladder.utilities import get_neighbors, build_rungs, get_ladders
+from word_ladder.compile_words import load_words
+from word_ladder.graph import WordGraph, load_graph
+from word_ladder.progress import print_progress
+from word_ladder.types import WordIndex
+from word_ladder.utilities import get_all_words, get_neighbors, build_rungs_bidirectional, count_ladders, iter_ladders
 
-from typing import Tuple
+from itertools import chain
+from typing import AbstractSet, Optional, Tuple, Union
 
 
-def input_start_and_target_words(words: WordDict) -> Tuple[str, str]:
-    all_words = {w for word_list in words.values() for w in word_list}
+def input_start_and_target_words(words: WordIndex, graph: Optional[WordGraph] = None) -> Tuple[str, str]:
+    # The graph already knows every word, so there is no need to collect them again.
+    all_words: Union[WordGraph, AbstractSet[str]] = graph if graph is not None else get_all_words(words)
 
     while True:
         start_word = input('Enter the starting word: ').lower()
@@ -36,15 +40,26 @@ def input_start_and_target_words(words: WordDict) -> Tuple[str, str]:
 
 if __name__ == '__main__':
     path = './data/words.txt'
-    words = read_words(path)
+    words = load_words(path)
+    graph = load_graph(path)
 
     while True:
-        start_word, target_word = input_start_and_target_words(words)
+        start_word, target_word = input_start_and_target_words(words, graph)
         if not start_word:
             print('Goodbye!')
             exit()
 
-        final_rung = build_rungs(start_word, target_word, words)
+        if target_word and graph.is_connected(start_word, target_word):
+            print()
+            graph_ladders = graph.iter_ladders(start_word, target_word)
+            first_ladder = next(graph_ladders)
+            print(f'{graph.count_ladders(start_word, target_word)} optimal solution(s) of length {len(first_ladder)} found:')
+            for ladder in chain([first_ladder], graph_ladders):
+                print(' → '.join(ladder))
+            print()
+            continue
+
+        final_rung = build_rungs_bidirectional(start_word, target_word, words, progress=print_progress)
 
         if len(final_rung.words) == 0:
             if (target_word):
@@ -57,8 +72,10 @@ if __name__ == '__main__':
             target_word = list(final_rung.words)[0]
 
         print()
-        ladders = get_ladders(final_rung, target_word)
-        print(f'{len(ladders)} optimal solution(s) of length {len(ladders[0])} found:')
-        for ladder in ladders:
+        ladder_count = count_ladders(final_rung, target_word)
+        rung_ladders = iter_ladders(final_rung, target_word)
+        first_ladder = next(rung_ladders)
+        print(f'{ladder_count} optimal solution(s) of length {len(first_ladder)} found:')
+        for ladder in chain([first_ladder], rung_ladders):
             print(' → '.join(ladder))
         print()
@@ -1,3 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Mapping, Sequence
 
 WordDict = Dict[str, List[str]]
+
+# Either a WordDict, or a read-only index such as `word_games.index_file.MappedWordDict`.
+WordIndex = Mapping[str, Sequence[str]]
@@ -1,6 +1,12 @@
-from typing import Dict, Iterable, Iterator, List, Sequence, Optional, Tuple
-from word_ladder.types import WordDict
+import random
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Optional, Set, Tuple
+from word_ladder.progress import ProgressCallback, RoundStats
+from word_ladder.types import WordIndex
 from word_ladder.rung import Rung
+from word_games.cache import TieredCache
+from word_games.instrument import instrument
 
 
 def get_word_with_letter_missing(word: str, position: int) -> str:
@@ -19,7 +25,7 @@ def get_word_with_letter_missing(word: str, position: int) -> str:
     return f'{word[:position]}?{word[position + 1:]}'
 
 
-def get_neighbors(word: str, words: WordDict) -> Sequence[str]:
+def get_neighbors(word: str, words: WordIndex) -> Sequence[str]:
     """
     >>> words = {'?og': ['dog', 'log', 'fog'], 'd?g': ['dog', 'dig'], 'do?': ['dog'], 'l?g': ['log'], 'lo?': ['log']}
     >>> sorted(get_neighbors('dig', words))
@@ -33,7 +39,17 @@ def get_neighbors(word: str, words: WordDict) -> Sequence[str]:
         for neighbor in words.get(get_word_with_letter_missing(word, position), [])
     )
 
-def get_all_previous_words(rung: Rung) -> Tuple[str]:
+def get_all_words(words: WordIndex) -> Set[str]:
+    """
+    >>> sorted(get_all_words({'?og': ['dog', 'log'], 'd?g': ['dog']}))
+    ['dog', 'log']
+    """
+    all_words = getattr(words, 'all_words', None)  # A MappedWordDict keeps its own list.
+    if all_words is not None:
+        return set(all_words())
+    return {w for word_list in words.values() for w in word_list}
+
+def get_all_previous_words(rung: Rung) -> Set[str]:
     """
     >>> rung_0 = Rung(None, ['dig'], {})
     >>> path = {'dog': ('log', 'fog', 'dig', 'dug', 'don', 'dob'), 'fig': ('dig', 'fog', 'fin')}
@@ -42,9 +58,15 @@ def get_all_previous_words(rung: Rung) -> Tuple[str]:
     >>> sorted(get_all_previous_words(rung_1))
     ['dig', 'dob', 'don', 'dug', 'fin', 'fog', 'log']
     """
-    return tuple(rung.words) + (get_all_previous_words(rung.previous) if rung.previous else ())
+    previous_words: Set[str] = set()
+    this_rung: Optional[Rung] = rung
+    while this_rung:
+        previous_words.update(this_rung.words)
+        this_rung = this_rung.previous
+    return previous_words
 
-def get_next_rung(previous_rung: Rung, words: WordDict) -> Rung:
+@instrument
+def get_next_rung(previous_rung: Rung, words: WordIndex) -> Rung:
     """
     >>> from word_ladder.compile_words import add_to_words_dict
     >>> words = {}
@@ -65,7 +87,7 @@ def get_next_rung(previous_rung: Rung, words: WordDict) -> Rung:
     word_soup = frozenset(w for these_words in path.values() for w in these_words)
     return Rung(previous_rung, word_soup, path)
 
-def keys_for_value(d: Dict[str, Iterable[str]], value: str) -> Iterator[str]:
+def keys_for_value(d: Mapping[str, Iterable[str]], value: str) -> Iterator[str]:
     """
     >>> d = {'a': ['x', 'y', 'z'], 'b': ['l', 'm', 'z'], 'c': ['t', 'u']}
     >>> list(keys_for_value(d, 'y'))
@@ -79,6 +101,47 @@ def keys_for_value(d: Dict[str, Iterable[str]], value: str) -> Iterator[str]:
         if value in values:
             yield key
 
+def get_rungs(rung: Rung) -> List[Rung]:
+    """
+    The rungs leading to this one, from the first.
+    """
+    rungs = [rung]
+    while rungs[-1].previous:
+        rungs.append(rungs[-1].previous)  # type: ignore
+    return rungs[::-1]
+
+def iter_ladders(rung: Rung, word: str) -> Iterator[List[str]]:
+    """
+    Yields the same ladders as `get_ladders`, in the same order, one at a time.
+    >>> rung_0 = Rung(None, ['dig'], {})
+    >>> rung_1 = Rung(rung_0, ['dog', 'fig', 'din'], {'dig': ('dog', 'fig', 'din')})
+    >>> rung_2 = Rung(rung_1, ['fin', 'fog'], {'dog': ('fog',), 'fig': ('fog', 'fin'), 'din': ('fin',)})
+    >>> ladders = iter_ladders(rung_2, 'fin')
+    >>> next(ladders), next(ladders), next(ladders, None)
+    (['dig', 'fig', 'fin'], ['dig', 'din', 'fin'], None)
+    >>> list(iter_ladders(rung_0, 'dig'))
+    [['dig']]
+    """
+    rungs = get_rungs(rung)[::-1]  # rungs[steps] is that many steps back from the last rung.
+    if len(rungs) == 1:
+        yield [word]
+        return
+    # The ladder is built backwards from the last word, trying the words leading to each word in turn.
+    backwards_ladder = [word]
+    choices = [iter(rung.parents.get(word, ()))]
+    while choices:
+        next_word = next(choices[-1], None)
+        if next_word is None:
+            choices.pop()
+            backwards_ladder.pop()
+            continue
+        backwards_ladder.append(next_word)
+        if len(choices) == len(rungs) - 1:
+            yield backwards_ladder[::-1]
+            backwards_ladder.pop()
+        else:
+            choices.append(iter(rungs[len(choices)].parents.get(next_word, ())))
+
 def get_ladders(rung: Rung, word: str) -> Sequence[List[str]]:
     """
     >>> rung_0 = Rung(None, ['dig'], {})
@@ -89,20 +152,234 @@ def get_ladders(rung: Rung, word: str) -> Sequence[List[str]]:
     >>> get_ladders(rung_2, 'fin')
     [['dig', 'fig', 'fin'], ['dig', 'din', 'fin']]
     """
+    return list(iter_ladders(rung, word))
+
+def get_ladder_counts(rung: Rung) -> List[Dict[str, int]]:
+    """
+    The number of shortest ladders from the first rung to each word, for each rung.
+    """
+    rungs = get_rungs(rung)
+    counts = [dict.fromkeys(rungs[0].words, 1)]
+    for this_rung in rungs[1:]:
+        previous_counts = counts[-1]
+        counts.append({
+            word: sum(previous_counts.get(source_word, 0) for source_word in source_words)
+            for word, source_words in this_rung.parents.items()
+        })
+    return counts
+
+def count_ladders(rung: Rung, word: str) -> int:
+    """
+    The number of ladders `get_ladders` would give, without listing them.
+    >>> rung_0 = Rung(None, ['dig'], {})
+    >>> rung_1 = Rung(rung_0, ['dog', 'fig', 'din'], {'dig': ('dog', 'fig', 'din')})
+    >>> rung_2 = Rung(rung_1, ['fin', 'fog'], {'dog': ('fog',), 'fig': ('fog', 'fin'), 'din': ('fin',)})
+    >>> count_ladders(rung_2, 'fin'), count_ladders(rung_2, 'fog'), count_ladders(rung_2, 'dog'), count_ladders(rung_0, 'dig')
+    (2, 2, 0, 1)
+    """
     if not rung.previous:
-        return [[word]]
-    return [
-        ladder + [word]
-        for previous_word in keys_for_value(rung.path, word)
-        for ladder in get_ladders(rung.previous, previous_word)
-    ]
-
-def build_rungs(start_word, target_word, words) -> Rung:
+        return 1
+    # Count backwards from the word, so only the words which lead to it are visited.
+    counts = {word: 1}
+    this_rung: Rung = rung
+    while this_rung.previous:
+        previous_counts: Dict[str, int] = {}
+        for this_word, count in counts.items():
+            for source_word in this_rung.parents.get(this_word, ()):
+                previous_counts[source_word] = previous_counts.get(source_word, 0) + count
+        counts = previous_counts
+        this_rung = this_rung.previous
+    return sum(counts.values())
+
+def get_ladder_by_number(rung: Rung, word: str, number: int, counts: Optional[List[Dict[str, int]]] = None) -> List[str]:
+    """
+    The same ladder as `get_ladders(rung, word)[number]`, without listing the ones before it.
+    >>> rung_0 = Rung(None, ['dig'], {})
+    >>> rung_1 = Rung(rung_0, ['dog', 'fig', 'din'], {'dig': ('dog', 'fig', 'din')})
+    >>> rung_2 = Rung(rung_1, ['fin', 'fog'], {'dog': ('fog',), 'fig': ('fog', 'fin'), 'din': ('fin',)})
+    >>> get_ladder_by_number(rung_2, 'fog', 1), get_ladders(rung_2, 'fog')[1]
+    (['dig', 'fig', 'fog'], ['dig', 'fig', 'fog'])
+    """
+    rungs = get_rungs(rung)
+    if counts is None:
+        counts = get_ladder_counts(rung)
+    backwards_ladder = [word]
+    for steps in range(len(rungs) - 1, 0, -1):
+        for source_word in rungs[steps].parents.get(backwards_ladder[-1], ()):
+            source_count = counts[steps - 1].get(source_word, 0)
+            if number < source_count:
+                backwards_ladder.append(source_word)
+                break
+            number -= source_count
+        else:
+            raise IndexError('There are not that many ladders')
+    return backwards_ladder[::-1]
+
+def sample_ladders(rung: Rung, word: str, k: int, rng: Optional[random.Random] = None) -> List[List[str]]:
+    """
+    Picks k different ladders at random (or all of them if there are fewer), in the order of `get_ladders`.
+    >>> rung_0 = Rung(None, ['dig'], {})
+    >>> rung_1 = Rung(rung_0, ['dog', 'fig', 'din'], {'dig': ('dog', 'fig', 'din')})
+    >>> rung_2 = Rung(rung_1, ['fin', 'fog'], {'dog': ('fog',), 'fig': ('fog', 'fin'), 'din': ('fin',)})
+    >>> sample_ladders(rung_2, 'fog', 5)
+    [['dig', 'dog', 'fog'], ['dig', 'fig', 'fog']]
+    >>> sample_ladders(rung_2, 'fog', 1, random.Random(1))
+    [['dig', 'dog', 'fog']]
+    """
+    if rng is None:
+        rng = random.Random()
+    counts = get_ladder_counts(rung)
+    total = counts[-1].get(word, 0) if rung.previous else 1
+    if total <= sys.maxsize:
+        numbers = rng.sample(range(total), min(k, total))
+    else:
+        # There are too many ladders for `range` to hold, so drawing the same one twice is unlikely.
+        chosen: Set[int] = set()
+        while len(chosen) < k:
+            chosen.add(rng.randrange(total))
+        numbers = list(chosen)
+    return [get_ladder_by_number(rung, word, number, counts) for number in sorted(numbers)]
+
+def get_canonical_words(start_word: str, target_word: str) -> Tuple[str, str]:
+    """
+    >>> get_canonical_words(' Dog', 'FIN ')
+    ('dog', 'fin')
+    """
+    return start_word.strip().lower(), target_word.strip().lower()
+
+
+def build_rungs(start_word: str, target_word: str, words: WordIndex, progress: Optional[ProgressCallback] = None,
+                cache: Optional[TieredCache] = None) -> Rung:
+    """
+    Adds rungs until one holds the target word, or there are no more words to reach.
+    With a cache (which should only be used with one word list), the rungs of each pair of words are only built
+    once, and are shared by every call (so should not be changed). There is no progress to report when they are
+    already in the cache.
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> from word_ladder.progress import print_progress
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'fig', 'fin']:
+    ...     words = add_to_words_dict(words, w)
+    >>> sorted(build_rungs('dog', 'fin', words).words)
+    ['fin']
+    >>> rung = build_rungs('dog', '', words, progress=print_progress)
+    Round 2:   3 possible words, eg. dig, fog, log
+    Round 3:   1 possible words, eg. fig
+    Round 4:   1 possible words, eg. fin
+    >>> from word_games.cache import LRUCache
+    >>> cache = TieredCache(LRUCache(100))
+    >>> build_rungs('dog', 'fin', words, cache=cache) is build_rungs('DOG ', 'fin', words, cache=cache)
+    True
+    """
+    if cache is not None:
+        start_word, target_word = get_canonical_words(start_word, target_word)
+        return cache.get_or_put(('build_rungs', start_word, target_word),
+                                lambda: build_rungs(start_word, target_word, words, progress))
     rung = Rung(None, [start_word], {})
     counter = 1
+    visited = 1
     while target_word not in rung.words and len(rung.words) > 0:
+        start_time = time.perf_counter() if progress else 0
         rung = get_next_rung(rung, words)
         counter += 1
-        if rung.words:
-            print(f'Round {counter}: {len(rung.words):3} possible words, eg. {", ".join(sorted(rung.words)[:6])}')
+        if progress:
+            visited += len(rung.words)
+            progress(RoundStats(counter, rung.words, visited, time.perf_counter() - start_time))
+    return rung
+
+
+def _expand(frontier: Iterable[str], distances: Dict[str, int], distance: int, words: WordIndex,
+            neighbors: Dict[str, Sequence[str]]) -> List[str]:
+    next_frontier = []
+    for word in frontier:
+        neighbors[word] = get_neighbors(word, words)
+        for neighbor in neighbors[word]:
+            if neighbor not in distances:
+                distances[neighbor] = distance
+                next_frontier.append(neighbor)
+    return next_frontier
+
+def build_rungs_bidirectional(start_word: str, target_word: str, words: WordIndex,
+                              progress: Optional[ProgressCallback] = None, cache: Optional[TieredCache] = None) -> Rung:
+    """
+    Finds the same shortest ladders as `build_rungs`, but searches from the start and the target word at once,
+    always growing the smaller frontier, until they meet.
+    The rungs it returns only hold the words on a shortest ladder, and the last rung is just the target word.
+    If there is no ladder (or no target word), it falls back to `build_rungs`.
+    Each round of `progress` is one step from either end. A cache is used in the same way as by `build_rungs`.
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'dug', 'dim', 'don', 'dob', 'lug', 'fin', 'fig', 'din', 'pin']:
+    ...     words = add_to_words_dict(words, w)
+    >>> rung = build_rungs_bidirectional('dog', 'fin', words)
+    >>> sorted(rung.words), [sorted(r.words) for r in (rung.previous, rung.previous.previous)]
+    (['fin'], [['din', 'fig'], ['dig', 'don', 'fog']])
+    >>> sorted(get_ladders(rung, 'fin'))
+    [['dog', 'dig', 'din', 'fin'], ['dog', 'dig', 'fig', 'fin'], ['dog', 'don', 'din', 'fin'], ['dog', 'fog', 'fig', 'fin']]
+    >>> sorted(get_ladders(build_rungs_bidirectional('dog', 'log', words), 'log'))
+    [['dog', 'log']]
+    """
+    if cache is not None:
+        start_word, target_word = get_canonical_words(start_word, target_word)
+        return cache.get_or_put(('build_rungs_bidirectional', start_word, target_word),
+                                lambda: build_rungs_bidirectional(start_word, target_word, words, progress))
+    if not target_word or start_word == target_word:
+        return build_rungs(start_word, target_word, words, progress)
+    from_start = {start_word: 0}
+    from_target = {target_word: 0}
+    start_frontier, target_frontier = [start_word], [target_word]
+    start_depth = target_depth = 0
+    neighbors: Dict[str, Sequence[str]] = {}
+    length = -1
+    counter = 1
+    while start_frontier and target_frontier and length < 0:
+        start_time = time.perf_counter() if progress else 0
+        if len(start_frontier) <= len(target_frontier):
+            start_depth += 1
+            start_frontier = frontier = _expand(start_frontier, from_start, start_depth, words, neighbors)
+            meeting = [from_target[word] for word in start_frontier if word in from_target]
+            if meeting:
+                length = start_depth + min(meeting)
+        else:
+            target_depth += 1
+            target_frontier = frontier = _expand(target_frontier, from_target, target_depth, words, neighbors)
+            meeting = [from_start[word] for word in target_frontier if word in from_start]
+            if meeting:
+                length = target_depth + min(meeting)
+                # All the words up to this distance from the start are on the start side.
+                start_depth = min(meeting)
+        counter += 1
+        if progress:
+            progress(RoundStats(counter, frontier, len(from_start) + len(from_target), time.perf_counter() - start_time))
+    if length < 0:
+        return build_rungs(start_word, target_word, words, progress)
+
+    # Every word on a shortest ladder is either at most `start_depth` from the start,
+    # or less than `target_depth` from the target, so both sides are complete enough to lay out the rungs.
+    layers: List[Set[str]] = [set() for _ in range(length + 1)]
+    for word, distance in from_start.items():
+        if distance <= start_depth:
+            layers[distance].add(word)
+    for word, distance in from_target.items():
+        if length - distance > start_depth:
+            layers[length - distance].add(word)
+    layers[length] = {target_word}
+
+    def get_cached_neighbors(word: str) -> Sequence[str]:
+        if word not in neighbors:
+            neighbors[word] = get_neighbors(word, words)
+        return neighbors[word]
+
+    # Keep only the words which lead to the target, and then only those which can be reached from the start.
+    for rung_number in range(length - 1, -1, -1):
+        layers[rung_number] = {word for word in layers[rung_number]
+                               if any(n in layers[rung_number + 1] for n in get_cached_neighbors(word))}
+    rung = Rung(None, [start_word], {})
+    for rung_number in range(1, length + 1):
+        path = {
+            source_word: tuple(sorted(n for n in get_cached_neighbors(source_word) if n in layers[rung_number]))
+            for source_word in sorted(rung.words)
+        }
+        layers[rung_number] = {word for next_words in path.values() for word in next_words}
+        rung = Rung(rung, frozenset(layers[rung_number]), path)
     return rung
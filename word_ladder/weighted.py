@@ -0,0 +1,174 @@
+"""
+Find the cheapest ladders between two words, with a priority queue rather than rung by rung.
+
+Each step onto a word can cost a different amount, eg. more for rarer words, so that ladders through common words
+are preferred. With the default cost of one per step, the cheapest ladders are the shortest ones.
+An A* search also uses the number of letters still to change as an estimate of the cost still to come,
+so it expands far fewer words than a breadth first search to reach the same target.
+
+Run with eg.:
+    python -m word_ladder.weighted party grows --frequencies word_counts.txt
+where each line of word_counts.txt is a word and the number of times it was seen.
+"""
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from word_ladder.types import WordIndex
+from word_ladder.utilities import get_neighbors
+
+# The cost of a step from one word to the next; it should be at least 1 for the A* heuristic to hold.
+StepCost = Callable[[str, str], float]
+Heuristic = Callable[[str], float]
+# The count used for words with none, so that they cost a little more than words seen once.
+MIN_COUNT = 0.5
+
+
+def get_unit_cost(word: str, next_word: str) -> float:
+    return 1.0
+
+
+def get_hamming_distance(word: str, other_word: str) -> int:
+    """
+    >>> get_hamming_distance('dog', 'dig'), get_hamming_distance('dog', 'cat')
+    (1, 3)
+    """
+    return sum(letter != other_letter for letter, other_letter in zip(word, other_word))
+
+
+def get_hamming_heuristic(target_word: str, min_step_cost: float = 1) -> Heuristic:
+    """
+    Every step changes one letter, so a ladder costs at least this much more to reach the target.
+    """
+    return lambda word: min_step_cost * get_hamming_distance(word, target_word)
+
+
+def get_frequency_cost(frequencies: Mapping[str, int]) -> StepCost:
+    """
+    Each step costs 1, plus more the rarer the word it steps onto (words with no count, or a count of 0,
+    cost the most).
+    >>> cost = get_frequency_cost({'dog': 100, 'dig': 10, 'dug': 0})
+    >>> cost('log', 'dog'), round(cost('dog', 'dig'), 2), round(cost('dog', 'dug'), 2), round(cost('dog', 'dot'), 2)
+    (1.0, 4.32, 8.64, 8.64)
+    >>> get_frequency_cost({'dog': 0})('log', 'dog')
+    1.0
+    """
+    most = max(max(frequencies.values(), default=1), MIN_COUNT)
+    return lambda word, next_word: 1 + math.log2(most / max(frequencies.get(next_word, 0), MIN_COUNT))
+
+
+def read_frequencies(path: str) -> Dict[str, int]:
+    frequencies = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                word, count = line.split()[:2]
+                frequencies[word.lower()] = int(count)
+    return frequencies
+
+
+@dataclass
+class SearchResult:
+    start_word: str
+    target_word: str
+    cost: Optional[float]  # None if there is no ladder.
+    # The words before each word on its cheapest ladders from the start.
+    parents: Dict[str, List[str]] = field(repr=False)
+    expanded: int  # The number of words whose neighbours were looked up.
+
+    def get_ladders(self) -> List[List[str]]:
+        """
+        All the cheapest ladders, in order.
+        """
+        if self.cost is None:
+            return []
+
+        def get_ladders_to(word: str) -> List[List[str]]:
+            if word == self.start_word:
+                return [[word]]
+            return [ladder + [word] for parent in self.parents[word] for ladder in get_ladders_to(parent)]
+
+        return sorted(get_ladders_to(self.target_word))
+
+
+def find_cheapest(
+    start_word: str,
+    target_word: str,
+    words: WordIndex,
+    step_cost: StepCost = get_unit_cost,
+    heuristic: Optional[Heuristic] = None,
+) -> SearchResult:
+    """
+    Searches outwards from the start word in order of cost so far plus the heuristic's estimate of the cost to go,
+    until every ladder as cheap as the cheapest one to the target has been found.
+    Without a heuristic, this is Dijkstra's algorithm; with one that never overestimates, it is A*.
+    >>> from word_ladder.compile_words import add_to_words_dict
+    >>> words = {}
+    >>> for w in ['dog', 'log', 'fog', 'dig', 'dug', 'don', 'fin', 'fig', 'din', 'pin', 'lug', 'big']:
+    ...     words = add_to_words_dict(words, w)
+    >>> result = find_cheapest('dog', 'fin', words)
+    >>> result.cost, result.get_ladders()
+    (3.0, [['dog', 'dig', 'din', 'fin'], ['dog', 'dig', 'fig', 'fin'], ['dog', 'don', 'din', 'fin'], ['dog', 'fog', 'fig', 'fin']])
+    >>> find_cheapest('dog', 'fin', words, heuristic=get_hamming_heuristic('fin')).get_ladders() == result.get_ladders()
+    True
+    >>> cost = get_frequency_cost({'dog': 100, 'dig': 90, 'din': 80, 'fin': 100, 'fog': 5, 'fig': 5, 'don': 5})
+    >>> find_cheapest('dog', 'fin', words, cost, get_hamming_heuristic('fin')).get_ladders()
+    [['dog', 'dig', 'din', 'fin']]
+    >>> find_cheapest('dog', 'cat', words)
+    SearchResult(start_word='dog', target_word='cat', cost=None, expanded=12)
+    """
+    if heuristic is None:
+        heuristic = lambda word: 0  # noqa: E731
+    costs = {start_word: 0.0}
+    parents: Dict[str, List[str]] = {start_word: []}
+    queue: List[Tuple[float, float, str]] = [(heuristic(start_word), 0.0, start_word)]
+    expanded = 0
+    target_cost: Optional[float] = None
+    while queue:
+        estimate, cost, word = heapq.heappop(queue)
+        if target_cost is not None and estimate > target_cost:
+            break
+        if cost > costs[word]:
+            continue  # A cheaper way to this word was found after this entry was queued.
+        if word == target_word:
+            target_cost = cost
+            continue
+        expanded += 1
+        for next_word in get_neighbors(word, words):
+            if next_word == word:
+                continue
+            next_cost = cost + step_cost(word, next_word)
+            if next_word not in costs or next_cost < costs[next_word]:
+                costs[next_word] = next_cost
+                parents[next_word] = [word]
+                heapq.heappush(queue, (next_cost + heuristic(next_word), next_cost, next_word))
+            elif next_cost == costs[next_word]:
+                parents[next_word].append(word)
+    return SearchResult(start_word, target_word, target_cost, parents, expanded)
+
+
+if __name__ == '__main__':
+    import time
+    from argparse import ArgumentParser
+    from word_ladder.compile_words import load_words
+
+    parser = ArgumentParser(description='Find the cheapest word ladders between two words.')
+    parser.add_argument('start')
+    parser.add_argument('target')
+    parser.add_argument('--frequencies', help='A file with a word and its count on each line, to prefer common words')
+    parser.add_argument('--no-heuristic', action='store_true', help='Search without the A* heuristic, to compare')
+    parser.add_argument('--words', default='./data/words.txt', help='The word list')
+    args = parser.parse_args()
+
+    words = load_words(args.words)
+    step_cost = get_frequency_cost(read_frequencies(args.frequencies)) if args.frequencies else get_unit_cost
+    start_time = time.perf_counter()
+    result = find_cheapest(args.start, args.target, words, step_cost,
+                           None if args.no_heuristic else get_hamming_heuristic(args.target))
+    seconds = time.perf_counter() - start_time
+    ladders = result.get_ladders()
+    print(f'{len(ladders)} cheapest solution(s) costing {result.cost} found, '
+          f'expanding {result.expanded:,} words in {1000 * seconds:.1f}ms:')
+    for ladder in ladders:
+        print(' → '.join(ladder))